@@ -12,10 +12,11 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 import os
 from pathlib import Path
 
+from kombu import Queue
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 
@@ -46,6 +47,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'user.roles.UserRoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -128,6 +130,71 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'assets')
 
+# Uploads (images, CVs, resumes) are stored once per distinct content,
+# see user/storage.py
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # collectstatic fingerprints and precompresses (user/static_storage.py)
+    'staticfiles': {'BACKEND': 'user.static_storage.CompressedManifestStaticFilesStorage'},
+    'media': {'BACKEND': 'user.storage.ContentAddressedStorage'},
+}
+# Uploads are served by user.views.media_file, which checks who may see
+# them (user/media_serving.py); not with django.conf.urls.static
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', str(BASE_DIR))
+# Hand the transfer to the front-end server once a download is allowed:
+# 'x-accel-redirect' (nginx, internal location at MEDIA_ACCEL_PREFIX),
+# 'x-sendfile' (Apache/lighttpd), or '' to send it from Django
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Seconds a blob must go unreferenced before dedupe_media --prune deletes it
+MEDIA_PRUNE_GRACE = 24 * 60 * 60
+# Serve STATIC_ROOT from the app with far-future caching (user/static_serving.py);
+# turn off when a front-end server handles STATIC_URL
+SERVE_STATIC = os.environ.get('SERVE_STATIC', '1') == '1'
+# Cut icon fonts down to the glyphs templates use during collectstatic (needs fontTools)
+STATIC_SUBSET_FONTS = os.environ.get('STATIC_SUBSET_FONTS') == '1'
+# Largest CV a candidate may upload (user/resumes.py)
+RESUME_MAX_BYTES = 5 * 1024 * 1024
+
+# Memory-mapped candidate/job feature matrices (user/matching.py)
+MATCHING_DIR = os.path.join(BASE_DIR, 'var', 'matching')
+
+# Caches (user/caching.py): a per-process LRU in front of a tier shared by
+# all workers -- a SQLite file by default, Redis when CACHE_REDIS_URL is set
+# (tests use local memory, see job_board/test_runner.py).
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+if CACHE_REDIS_URL:
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_REDIS_URL}
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'user.caching.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'var', 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'user.caching.TieredCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_BYTES': 16 * 1024 * 1024,
+            'LOCAL_TIMEOUT': 5,
+            'JITTER': 0.1,
+        },
+    },
+    'shared': SHARED_CACHE,
+}
+
+# search_results: sections searched concurrently, and how long to wait for them (seconds)
+UNIFIED_SEARCH_WORKERS = 3
+UNIFIED_SEARCH_TIMEOUT = 2.0
+
+# job_board/test_runner.py: test-only settings
+TEST_RUNNER = 'job_board.test_runner.TestRunner'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -153,4 +220,27 @@ DEFAULT_FROM_EMAIL = 'thesni.inform@gmail.com'
 
 CELERY_BROKER_URL = 'amqp://localhost'  # Using RabbitMQ as the broker
 CELERY_ACCEPT_CONTENT = ['json']
-CELERY_TASK_SERIALIZER = 'json'
\ No newline at end of file
+CELERY_TASK_SERIALIZER = 'json'
+# Tasks are published from requests (user.tasks.enqueue): when the broker is
+# down, give up after one quick retry instead of stalling the response
+CELERY_BROKER_TRANSPORT_OPTIONS = {'max_retries': 1, 'interval_start': 0, 'interval_step': 0.2}
+
+# Run tasks in-process (no broker) when asked to; the test runner always does
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER') == '1'
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# CV text extraction (user/resume_text.py) has its own queue, capped so a
+# backlog can't grow without bound; extract_resume_texts catches up on
+# anything rejected
+RESUME_TEXT_QUEUE_MAX = 10000
+CELERY_TASK_QUEUES = (
+    Queue('celery'),
+    Queue('resumes', queue_arguments={'x-max-length': RESUME_TEXT_QUEUE_MAX, 'x-overflow': 'reject-publish'}),
+)
+CELERY_TASK_ROUTES = {'user.tasks.extract_resume_text_task': {'queue': 'resumes'}}
+
+# Delta exports hold back changes younger than this many seconds, so rows
+# from transactions still in flight aren't skipped by the watermark
+DELTA_EXPORT_LAG = 5
+# purge_tombstones keeps deleted-application records this many days
+DELTA_TOMBSTONE_DAYS = 90
@@ -0,0 +1,38 @@
+"""
+``manage.py test`` runner (settings.TEST_RUNNER).
+
+Swaps in the few settings a test run needs with ``override_settings``, so
+settings.py doesn't have to guess from the command line whether it is
+under test.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def test_settings():
+    return {
+        # Templates render {% static %} without a collectstatic manifest
+        'STORAGES': {
+            **settings.STORAGES,
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        },
+        # Nothing shared between test runs
+        'CACHES': {
+            **settings.CACHES,
+            'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+        },
+        # Tasks run in-process; there is no broker
+        'CELERY_TASK_ALWAYS_EAGER': True,
+    }
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(**test_settings())
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
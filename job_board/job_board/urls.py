@@ -14,8 +14,10 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include 
+from django.urls import path, include, re_path
 
 
 urlpatterns = [
@@ -23,6 +25,9 @@ urlpatterns = [
     path('', include('user.urls')), 
 ]
 from django.conf import settings
-from django.conf.urls.static import static
 
-urlpatterns +=static(settings.MEDIA_URL,document_root=settings.MEDIA_ROOT)
+if settings.SERVE_STATIC and not settings.DEBUG:
+    # Under DEBUG, runserver serves static files from the app directories
+    from user.static_serving import serve as serve_static
+
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static)]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'job_board.settings')
 
 application = get_wsgi_application()
+
+# Load the in-memory fuzzy job search index before the first request
+from user.fuzzy import warm_index  # noqa: E402
+
+warm_index()
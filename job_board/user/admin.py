@@ -4,4 +4,8 @@ from user.models import*
 admin.site.register(Applicant)
 admin.site.register(Company)
 admin.site.register(Job)
-admin.site.register(Application) 
\ No newline at end of file
+admin.site.register(Application)
+admin.site.register(Skill)
+admin.site.register(ExportJob)
+admin.site.register(Resume)
+admin.site.register(ResumeText)
@@ -0,0 +1,418 @@
+"""Two-tier cache backend behind ``django.core.cache.cache``.
+
+``TieredCache`` is the ``default`` cache. Reads go to a small in-process
+LRU first and then to a shared tier that every worker process sees; writes
+go to both. The shared tier is another entry in ``CACHES`` (``SQLiteCache``
+below by default, Django's ``RedisCache`` when ``CACHE_REDIS_URL`` is set,
+``LocMemCache`` under the test runner), so swapping it is a settings change.
+
+Values stay in the local tier for at most ``LOCAL_TIMEOUT`` seconds, which
+bounds how long one process can serve a value another process has already
+replaced or deleted. Timeouts are jittered so entries written together
+don't all expire together, and ``get_or_set`` lets a single caller compute
+a missing value while others wait for it (within this process by lock,
+across processes by a lock key in the shared tier).
+
+Hit, miss, set and eviction counts are kept per process and periodically
+added to counters in the shared tier; ``manage.py cache_stats`` prints them.
+"""
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+
+METRIC_NAMES = (
+    'local_hits', 'local_misses', 'shared_hits', 'shared_misses',
+    'sets', 'deletes', 'local_evictions', 'shared_evictions', 'coalesced', 'lock_waits',
+)
+METRICS_PREFIX = 'cache-metrics'
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(METRIC_NAMES, 0)
+        self._unflushed = dict.fromkeys(METRIC_NAMES, 0)
+        self._flushed_at = time.monotonic()
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+            self._unflushed[name] += n
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self, shared, interval=0):
+        """Add the counts since the last flush to the totals in ``shared``."""
+        with self._lock:
+            if time.monotonic() - self._flushed_at < interval:
+                return
+            pending, self._unflushed = self._unflushed, dict.fromkeys(METRIC_NAMES, 0)
+            self._flushed_at = time.monotonic()
+        for name, n in pending.items():
+            if not n:
+                continue
+            key = f'{METRICS_PREFIX}:{name}'
+            shared.add(key, 0, None)
+            try:
+                shared.incr(key, n)
+            except ValueError:
+                shared.set(key, n, None)
+
+    def totals(self, shared):
+        return {name: shared.get(f'{METRICS_PREFIX}:{name}', 0) for name in METRIC_NAMES}
+
+
+metrics = Metrics()
+
+
+class LRU:
+    """Pickled values bounded by total size in bytes, least recently used out first."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            data, expires = entry
+            if expires <= time.monotonic():
+                self._pop(key)
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._pop(key)
+            if len(data) > self.max_bytes:
+                return
+            self._data[key] = (data, time.monotonic() + timeout)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._pop(oldest)
+                metrics.incr('local_evictions')
+
+    def delete(self, key):
+        with self._lock:
+            return self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= len(entry[0])
+        return True
+
+
+class TieredCache(BaseCache):
+    """
+    OPTIONS:
+        SHARED: alias of the shared cache (default ``'shared'``)
+        LOCAL_MAX_BYTES: size of the in-process tier (default 16 MB)
+        LOCAL_TIMEOUT: longest a value stays in the in-process tier (default 5s)
+        JITTER: timeouts are spread by +/- this fraction (default 0.1)
+        LOCK_TIMEOUT: how long a get_or_set lock may be held (default 30s)
+        LOCK_WAIT: how long others wait for it before computing too (default 2s)
+        METRICS_INTERVAL: seconds between metric flushes to the shared tier (default 30)
+    """
+
+    STRIPES = 64
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local = LRU(options.get('LOCAL_MAX_BYTES', 16 * 1024 * 1024))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.jitter = options.get('JITTER', 0.1)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        self.lock_wait = options.get('LOCK_WAIT', 2.0)
+        self.metrics_interval = options.get('METRICS_INTERVAL', 30)
+        self._stripes = [threading.Lock() for _ in range(self.STRIPES)]
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _timeout(self, timeout):
+        """Jittered timeout for the shared tier; None means never expire."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None or timeout <= 0:
+            return timeout
+        return max(1, round(timeout * random.uniform(1 - self.jitter, 1 + self.jitter)))
+
+    def _local_timeout(self, timeout):
+        return self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+
+    def _record(self, name):
+        metrics.incr(name)
+        if self.metrics_interval is not None:
+            metrics.flush(self.shared, self.metrics_interval)
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version)
+        value = self.local.get(local_key)
+        if value is not _MISSING:
+            self._record('local_hits')
+            return value
+        metrics.incr('local_misses')
+
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._record('shared_misses')
+            return default
+        self._record('shared_hits')
+        self.local.set(local_key, value, self.local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        self.shared.set(key, value, timeout, version=version)
+        local_key = self.make_and_validate_key(key, version)
+        if timeout is not None and timeout <= 0:
+            self.local.delete(local_key)
+        else:
+            self.local.set(local_key, value, self._local_timeout(timeout))
+        self._record('sets')
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        added = self.shared.add(key, value, timeout, version=version)
+        if added and (timeout is None or timeout > 0):
+            self.local.set(self.make_and_validate_key(key, version), value, self._local_timeout(timeout))
+            self._record('sets')
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(self.make_and_validate_key(key, version))
+        return self.shared.touch(key, self._timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self.make_and_validate_key(key, version))
+        self._record('deletes')
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self.local.get(self.make_and_validate_key(key, version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters live in the shared tier only, where increments are atomic
+        self.local.delete(self.make_and_validate_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Like BaseCache.get_or_set, but concurrent misses for the same key
+        compute ``default()`` once and share the result.
+        """
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            return super().get_or_set(key, default, timeout, version)
+
+        local_key = self.make_and_validate_key(key, version)
+        with self._stripes[hash(local_key) % self.STRIPES]:
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                metrics.incr('coalesced')
+                return value
+
+            lock_key = f'{key}:single-flight'
+            if self.shared.add(lock_key, 1, self.lock_timeout, version=version):
+                try:
+                    value = default()
+                    self.set(key, value, timeout, version=version)
+                    return value
+                finally:
+                    self.shared.delete(lock_key, version=version)
+
+            # Another process is computing it
+            metrics.incr('lock_waits')
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                time.sleep(0.02)
+                value = self.shared.get(key, _MISSING, version=version)
+                if value is not _MISSING:
+                    metrics.incr('coalesced')
+                    return value
+            value = default()
+            self.set(key, value, timeout, version=version)
+            return value
+
+
+class SQLiteCache(BaseCache):
+    """
+    A cache in one SQLite file that all processes on the host share.
+
+    LOCATION is the file path. WAL mode lets readers run alongside the
+    single writer. Expired rows are dropped when read and, with the oldest
+    rows beyond MAX_ENTRIES, on an occasional cull after writes.
+    """
+
+    CULL_PROBABILITY = 0.02
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+            self._local.db = db
+        return db
+
+    def _expires(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else time.time() + timeout
+
+    @staticmethod
+    def _dumps(value):
+        return zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), 1)
+
+    @staticmethod
+    def _loads(data):
+        return pickle.loads(zlib.decompress(data))
+
+    def _row(self, key):
+        row = self._db.execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            self._db.execute('DELETE FROM cache WHERE key = ? AND expires = ?', (key, row[1]))
+            return None
+        return row
+
+    def get(self, key, default=None, version=None):
+        row = self._row(self.make_and_validate_key(key, version))
+        return default if row is None else self._loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version)
+        if timeout is not None and timeout != DEFAULT_TIMEOUT and timeout <= 0:
+            self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+            return
+        self._db.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._dumps(value), self._expires(timeout)),
+        )
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if self._row(key) is not None:
+                added = False
+            else:
+                db.execute(
+                    'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+                    (key, self._dumps(value), self._expires(timeout)),
+                )
+                added = True
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        if added:
+            self._maybe_cull()
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._row(key)
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = self._loads(row[0]) + delta
+            db.execute('UPDATE cache SET value = ? WHERE key = ?', (self._dumps(value), key))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version)
+        if self._row(key) is None:
+            return False
+        self._db.execute('UPDATE cache SET expires = ? WHERE key = ?', (self._expires(timeout), key))
+        return True
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version)
+        return self._db.execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        return self._row(self.make_and_validate_key(key, version)) is not None
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests
+        pass
+
+    def _maybe_cull(self):
+        if random.random() >= self.CULL_PROBABILITY:
+            return
+        db = self._db
+        removed = db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),)).rowcount
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            excess = count - self._max_entries + self._max_entries // self._cull_frequency
+            removed += db.execute(
+                'DELETE FROM cache WHERE key IN '
+                '(SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?)',
+                (excess,),
+            ).rowcount
+        if removed:
+            metrics.incr('shared_evictions', removed)
@@ -0,0 +1,95 @@
+"""Conditional GET (ETag / Last-Modified) for detail pages.
+
+A page's state function answers "when did this page last change?" with one
+narrow query on the ``updated_at`` columns, without loading the objects
+the page shows. If the client already has that version the view isn't run
+at all and a 304 goes back.
+
+The same URL renders differently per visitor (header, apply buttons), so
+the ETag also covers the user, their role and their CSRF secret (forms
+on the page embed a token derived from it, and logging in rotates it),
+and responses carry ``Vary: Cookie``. Pages for logged-in users are marked private so shared
+caches don't keep them. While ``django.contrib.messages`` has messages
+waiting (set before a redirect here), the page is rendered in full and
+without validators, so they are not lost behind a 304.
+"""
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .matching import applicant_vectors
+from .models import Applicant, Company, Job
+from .roles import resolve_role
+
+
+def page_etag(request, last_modified, *parts):
+    role = getattr(request, 'user_role', None) or resolve_role(request)
+    # Set by CsrfViewMiddleware from the cookie (or session); None before the first form
+    csrf_secret = request.META.get('CSRF_COOKIE')
+    key = ':'.join(str(part) for part in (last_modified.isoformat(), request.user.pk, role.name, csrf_secret) + parts)
+    return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def conditional_page(state):
+    """
+    Answer GETs with 304 when the page hasn't changed.
+
+    ``state(request, *args, **kwargs)`` returns ``(last_modified, *extra)``
+    where ``extra`` is anything else the page depends on, or None when the
+    object doesn't exist (the view then runs and deals with it).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return view(request, *args, **kwargs)
+            found = state(request, *args, **kwargs)
+            if found is None:
+                return view(request, *args, **kwargs)
+
+            last_modified, *extra = found
+            etag = page_etag(request, last_modified, *extra)
+            timestamp = timegm(last_modified.utctimetuple())
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers.setdefault('ETag', etag)
+                response.headers.setdefault('Last-Modified', http_date(timestamp))
+            patch_vary_headers(response, ('Cookie',))
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def job_state(request, myid):
+    row = Job.objects.filter(pk=myid).values_list('updated_at', 'company__updated_at').first()
+    return (max(row),) if row else None
+
+
+def job_candidates_state(request, myid):
+    # Top candidates change whenever an applicant's vector does
+    row = job_state(request, myid)
+    return row + (applicant_vectors.version(),) if row else None
+
+
+def candidate_state(request, myid):
+    updated_at = Applicant.objects.filter(pk=myid).values_list('updated_at', flat=True).first()
+    return (updated_at,) if updated_at else None
+
+
+def company_jobs_state(request, company_id):
+    row = (
+        Company.objects.filter(pk=company_id)
+        .annotate(jobs_updated_at=Max('job__updated_at'))
+        .values_list('updated_at', 'jobs_updated_at')
+        .first()
+    )
+    return (max(filter(None, row)),) if row else None
@@ -0,0 +1,123 @@
+"""Denormalized job and application counts.
+
+``Company.job_count``, ``*.application_count`` and
+``*.pending_application_count`` are kept up to date by the signals in
+``user.signals`` with single ``UPDATE ... SET n = n + 1`` statements, so
+concurrent requests can't lose increments. Anything that bypasses signals
+(``QuerySet.update()``, raw SQL, fixtures) can leave them off;
+``reconcile_counters`` recomputes them from the real rows. Until then,
+decrements stop at zero instead of tripping the columns' CHECK (>= 0)
+constraint and failing the delete that triggered them.
+"""
+from collections import Counter
+
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.timezone import now
+
+from .models import Application, Company, Job
+
+PENDING = 'pending'
+
+
+def _adjusted(field, delta):
+    # Never below zero, even when the stored count has drifted low
+    return Greatest(F(field) + delta, Value(0))
+
+
+def _bump(queryset, **deltas):
+    changes = {field: _adjusted(field, delta) for field, delta in deltas.items() if delta}
+    if changes:
+        queryset.update(**changes)
+
+
+def job_added(job):
+    # The company's vacancies page changes too
+    Company.objects.filter(pk=job.company_id).update(job_count=F('job_count') + 1, updated_at=now())
+
+
+def job_removed(job):
+    Company.objects.filter(pk=job.company_id).update(job_count=_adjusted('job_count', -1), updated_at=now())
+
+
+def _applications_changed(job_id, total, pending):
+    _bump(Job.objects.filter(pk=job_id), application_count=total, pending_application_count=pending)
+    _bump(Company.objects.filter(job__id=job_id), application_count=total, pending_application_count=pending)
+
+
+def application_added(application):
+    _applications_changed(application.job_id, 1, int(application.status == PENDING))
+
+
+def application_removed(application):
+    _applications_changed(application.job_id, -1, -int(application.status == PENDING))
+
+
+def status_changed(application, old_status):
+    pending = int(application.status == PENDING) - int(old_status == PENDING)
+    _applications_changed(application.job_id, 0, pending)
+
+
+def statuses_changed(applications, old_statuses):
+    """
+    Counter updates for a bulk status change (``user.statuses``), whose
+    ``bulk_update`` skips the signals. ``applications`` carry their new
+    status and their job; ``old_statuses`` is ``{pk: status before}``.
+    One UPDATE for the jobs and one for the companies, however many rows.
+    """
+    per_job, per_company = Counter(), Counter()
+    for application in applications:
+        pending = int(application.status == PENDING) - int(old_statuses[application.pk] == PENDING)
+        per_job[application.job_id] += pending
+        per_company[application.job.company_id] += pending
+    for model, deltas in ((Job, per_job), (Company, per_company)):
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if deltas:
+            model.objects.filter(pk__in=deltas).update(pending_application_count=_adjusted(
+                'pending_application_count',
+                Case(
+                    *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+                    default=Value(0), output_field=IntegerField(),
+                ),
+            ))
+
+
+def _count(model, group_by, **filters):
+    counts = (
+        model.objects.filter(**{group_by: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(group_by)
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _repair(queryset, **expressions):
+    # Only rewrite rows whose stored value differs from the real count
+    annotated = queryset.annotate(**{f'actual_{field}': expr for field, expr in expressions.items()})
+    drift = Q()
+    for field in expressions:
+        drift |= ~Q(**{field: F(f'actual_{field}')})
+    stale = annotated.filter(drift)
+    fixed = 0
+    for row in stale.values('pk', *[f'actual_{field}' for field in expressions]):
+        queryset.filter(pk=row['pk']).update(**{field: row[f'actual_{field}'] for field in expressions})
+        fixed += 1
+    return fixed
+
+
+def reconcile(company_model=Company, job_model=Job, application_model=Application):
+    """Recompute every counter from the rows it counts; returns the number of rows fixed."""
+    fixed = _repair(
+        job_model.objects.all(),
+        application_count=_count(application_model, 'job'),
+        pending_application_count=_count(application_model, 'job', status=PENDING),
+    )
+    fixed += _repair(
+        company_model.objects.all(),
+        job_count=_count(job_model, 'company'),
+        application_count=_count(application_model, 'job__company'),
+        pending_application_count=_count(application_model, 'job__company', status=PENDING),
+    )
+    return fixed
@@ -0,0 +1,111 @@
+"""Incremental (delta) exports of a company's applications.
+
+A client syncs by passing back the watermark from its previous call and
+gets only the applications created or changed since then, plus tombstones
+for the ones deleted since then. Both streams are walked in
+``(timestamp, id)`` order from the watermark's position, so each call
+reads only the rows that changed and a page boundary never splits rows
+that share a timestamp.
+
+Rows whose timestamp is within ``DELTA_EXPORT_LAG`` seconds of now are
+left for the next call: a transaction that started earlier may still
+commit a row with an older ``updated_at``, and the watermark would
+already have moved past it.
+
+``updated_at`` is only set by ``Model.save()``; code that changes
+applications with ``QuerySet.update()`` or ``bulk_update()`` has to set it
+too or the change won't be exported.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from .exports import HEADERS, ROW_FIELDS, to_row
+from .models import Application, ApplicationTombstone
+
+WATERMARK_SALT = 'user.delta.watermark'
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+class InvalidWatermark(Exception):
+    pass
+
+
+def encode_watermark(updated, deleted):
+    """``updated`` and ``deleted`` are the (timestamp, id) of the last row seen in each stream."""
+    return signing.dumps(
+        [[updated[0].isoformat(), updated[1]] if updated else None,
+         [deleted[0].isoformat(), deleted[1]] if deleted else None],
+        salt=WATERMARK_SALT, compress=True,
+    )
+
+
+def decode_watermark(watermark):
+    """The (updated, deleted) positions in a watermark; (None, None) for a first sync."""
+    if not watermark:
+        return None, None
+    try:
+        positions = signing.loads(watermark, salt=WATERMARK_SALT)
+        return tuple(
+            (parse_datetime(position[0]), int(position[1])) if position else None
+            for position in positions
+        )
+    except (signing.BadSignature, TypeError, ValueError, IndexError):
+        raise InvalidWatermark(watermark)
+
+
+def _after(queryset, field, position):
+    if position is None:
+        return queryset
+    timestamp, pk = position
+    return queryset.filter(Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk}))
+
+
+def changes_since(company, watermark=None, limit=DEFAULT_LIMIT):
+    """
+    Up to ``limit`` changed and ``limit`` deleted applications of ``company``
+    after ``watermark``. ``has_more`` tells the client to call again straight
+    away with the returned watermark.
+    """
+    updated, deleted = decode_watermark(watermark)
+    horizon = now() - timedelta(seconds=settings.DELTA_EXPORT_LAG)
+
+    changed_rows = list(
+        _after(Application.objects.filter(job__company=company, updated_at__lt=horizon), 'updated_at', updated)
+        .order_by('updated_at', 'id')
+        .values_list('updated_at', 'id', *ROW_FIELDS)[:limit + 1]
+    )
+    deleted_rows = list(
+        _after(ApplicationTombstone.objects.filter(company_id=company.pk, deleted_at__lt=horizon), 'deleted_at', deleted)
+        .order_by('deleted_at', 'id')
+        .values_list('deleted_at', 'id', 'application_id', 'job_id')[:limit + 1]
+    )
+    has_more = len(changed_rows) > limit or len(deleted_rows) > limit
+    changed_rows, deleted_rows = changed_rows[:limit], deleted_rows[:limit]
+
+    if changed_rows:
+        updated = changed_rows[-1][:2]
+    if deleted_rows:
+        deleted = deleted_rows[-1][:2]
+    return {
+        'changed': [
+            {'id': pk, 'updated_at': updated_at, **dict(zip(HEADERS, to_row(values)))}
+            for updated_at, pk, *values in changed_rows
+        ],
+        'deleted': [
+            {'id': application_id, 'job_id': job_id, 'deleted_at': deleted_at}
+            for deleted_at, _, application_id, job_id in deleted_rows
+        ],
+        'watermark': encode_watermark(updated, deleted),
+        'has_more': has_more,
+    }
+
+
+def purge_tombstones(older_than):
+    """Delete tombstones older than ``older_than``; clients that haven't synced since then must resync from scratch."""
+    return ApplicationTombstone.objects.filter(deleted_at__lt=older_than).delete()[0]
@@ -0,0 +1,202 @@
+"""Application exports.
+
+Rows come from one joined ``values_list`` query read with ``iterator()``,
+so only a chunk of rows is in memory at a time (a server-side cursor on
+PostgreSQL) and no per-row related lookups happen.
+
+Small exports stream straight out of all_download. Filtered bulk exports
+are ``ExportJob`` rows run by ``tasks.export_applications_task``: the file
+is written chunk by chunk to a temporary file, progress is saved after
+each chunk, and the finished file is moved to storage. XLSX needs
+openpyxl and Parquet needs pyarrow; formats whose library isn't installed
+aren't offered.
+"""
+import csv
+import importlib.util
+import logging
+import os
+import tempfile
+
+from django.core.files import File
+from django.utils.timezone import now
+
+from .models import Application, ExportJob
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+
+# (CSV header, field path), in export order
+APPLICATION_COLUMNS = [
+    ('Company', 'company'),
+    ('Job', 'job__title'),
+    ('Start Date', 'job__start_date'),
+    ('Deadline', 'job__end_date'),
+    ('Required Skills', 'job__skills'),
+    ('Required Experience', 'job__experience'),
+    ('Job Type', 'job__job_type'),
+    ('Work Mode', 'job__work_location'),
+    ('Applicant', None),  # first + last name, like User.get_full_name()
+    ('Email', 'applicant__user__email'),
+    ('PassedOut Year', 'applicant__year'),
+    ('Gender', 'applicant__gender'),
+    ('Phone', 'applicant__phone'),
+    ('Education', 'applicant__education_level'),
+    ('Resume', 'resume'),
+    ('Experience', 'applicant__work'),
+    ('Candidate Place', 'applicant__location'),
+    ('Candidate District', 'applicant__district'),
+    ('Candidate State', 'applicant__state'),
+    ('Candidate Country', 'applicant__country'),
+    ('Candidate Pincode', 'applicant__pincode'),
+    ('Type', 'applicant__type'),
+    ('Applied On', 'apply_date'),
+    ('Status', 'status'),
+]
+
+HEADERS = [header for header, _ in APPLICATION_COLUMNS]
+ROW_FIELDS = [field for _, field in APPLICATION_COLUMNS if field] + ['applicant__user__first_name', 'applicant__user__last_name']
+_NAME_AT = HEADERS.index('Applicant')
+
+
+def company_applications(company):
+    return Application.objects.filter(job__company=company).order_by('pk')
+
+
+def filter_applications(applications, job=None, status=None, date_from=None, date_to=None):
+    """Narrow applications by job id, status and apply_date range (ISO dates, inclusive)."""
+    if job:
+        applications = applications.filter(job_id=job)
+    if status:
+        applications = applications.filter(status=status)
+    if date_from:
+        applications = applications.filter(apply_date__gte=date_from)
+    if date_to:
+        applications = applications.filter(apply_date__lte=date_to)
+    return applications
+
+
+def to_row(values):
+    """An export row (list in HEADERS order) from ``values_list(*ROW_FIELDS)`` values."""
+    *row, first_name, last_name = values
+    row.insert(_NAME_AT, f'{first_name} {last_name}'.strip())
+    return row
+
+
+def application_rows(applications, chunk_size=CHUNK_SIZE):
+    """Export rows for an Application queryset."""
+    for values in applications.values_list(*ROW_FIELDS).iterator(chunk_size=chunk_size):
+        yield to_row(values)
+
+
+class Echo:
+    """File-like object whose write() hands the line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    # The header goes out before the query runs, so the first byte doesn't
+    # wait on the database
+    yield writer.writerow(HEADERS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+# format: (file extension, content type, module it needs)
+FORMATS = {
+    ExportJob.CSV: ('csv', 'text/csv', None),
+    ExportJob.XLSX: ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'openpyxl'),
+    ExportJob.PARQUET: ('parquet', 'application/vnd.apache.parquet', 'pyarrow'),
+}
+
+
+def available_formats():
+    return [
+        (value, label) for value, label in ExportJob.FORMAT_CHOICES
+        if FORMATS[value][2] is None or importlib.util.find_spec(FORMATS[value][2]) is not None
+    ]
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_csv(chunks, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            yield len(chunk)
+
+
+def write_xlsx(chunks, path):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Applications')
+    sheet.append(HEADERS)
+    for chunk in chunks:
+        for row in chunk:
+            sheet.append(row)
+        yield len(chunk)
+    workbook.save(path)
+
+
+def write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(header, pa.string()) for header in HEADERS])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            columns = [[None if value is None else str(value) for value in column] for column in zip(*chunk)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            yield len(chunk)
+
+
+WRITERS = {
+    ExportJob.CSV: write_csv,
+    ExportJob.XLSX: write_xlsx,
+    ExportJob.PARQUET: write_parquet,
+}
+
+
+def run_export(export_id, chunk_size=CHUNK_SIZE):
+    """Write an ExportJob's file, saving progress after every chunk."""
+    export = ExportJob.objects.select_related('company').get(pk=export_id)
+    applications = filter_applications(company_applications(export.company), **export.filters)
+    ExportJob.objects.filter(pk=export.pk).update(
+        status=ExportJob.RUNNING, total_rows=applications.count(), processed_rows=0,
+    )
+
+    extension = FORMATS[export.format][0]
+    fd, path = tempfile.mkstemp(suffix='.' + extension)
+    os.close(fd)
+    try:
+        processed = 0
+        chunks = _chunks(application_rows(applications, chunk_size), chunk_size)
+        for written in WRITERS[export.format](chunks, path):
+            processed += written
+            ExportJob.objects.filter(pk=export.pk).update(processed_rows=processed)
+
+        with open(path, 'rb') as f:
+            export.file.save(f'applications-{export.pk}.{extension}', File(f), save=False)
+        ExportJob.objects.filter(pk=export.pk).update(
+            status=ExportJob.DONE, file=export.file.name, processed_rows=processed, finished_at=now(),
+        )
+    except Exception as e:
+        logger.exception("Export %s failed", export.pk)
+        ExportJob.objects.filter(pk=export.pk).update(status=ExportJob.FAILED, error=str(e), finished_at=now())
+    finally:
+        os.remove(path)
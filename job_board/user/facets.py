@@ -0,0 +1,127 @@
+"""Filter counts for the job_listing sidebar.
+
+All facets come out of a single GROUP BY over (job_type, experience, age
+bucket); the per-option counts are then folded together in Python. Each
+facet is counted with every *other* active filter applied, so an option's
+count is the number of jobs the user would get by ticking it.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Value, When
+from django.utils.timezone import now
+
+from .models import Job
+from .skills import parse_skills
+
+POSTED_WITHIN_CHOICES = [
+    (1, 'Today'),
+    (2, 'Last 2 days'),
+    (3, 'Last 3 days'),
+    (5, 'Last 5 days'),
+    (10, 'Last 10 days'),
+]
+
+FACET_CACHE_TIMEOUT = 60
+
+
+def normalize_filters(query, job_types, experiences, posted_within, skills=(), skill_match='any', origin=None, radius=None):
+    # Same rules as job_listing: the narrowest "posted within" wins and any
+    # non-numeric choice ("Any") disables the date filter. Counts are taken
+    # inside the radius search, so the resolved origin and radius are part
+    # of the key too.
+    try:
+        days = min(int(d) for d in posted_within) if posted_within else None
+    except ValueError:
+        days = None
+    return {
+        'q': ' '.join((query or '').lower().split()),
+        'job_type': sorted(set(job_types)),
+        'experience': sorted(set(experiences)),
+        'posted_within': days,
+        'skills': sorted(parse_skills(skills)),
+        'skill_match': 'all' if skill_match == 'all' else 'any',
+        'near': [round(origin[0], 5), round(origin[1], 5), radius] if origin else None,
+    }
+
+
+def _cache_key(filters):
+    digest = hashlib.md5(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    return f'job_facets:{digest}'
+
+
+def _grouped_counts(jobs):
+    current = now()
+    age_bucket = Case(
+        *[When(creation_date__gte=current - timedelta(days=d), then=Value(d)) for d, _ in POSTED_WITHIN_CHOICES],
+        default=Value(None),
+        output_field=IntegerField(),
+    )
+    return list(
+        jobs.order_by()
+        .annotate(age_bucket=age_bucket)
+        .values_list('job_type', 'experience', 'age_bucket')
+        .annotate(n=Count('id'))
+    )
+
+
+def job_facets(jobs, filters):
+    """
+    Counts for every job_listing facet.
+
+    ``jobs`` is the listing queryset *before* the facet filters are applied
+    (i.e. only the search query and skills); ``filters`` comes from
+    normalize_filters().
+    """
+    return cache.get_or_set(_cache_key(filters), lambda: _count_facets(jobs, filters), FACET_CACHE_TIMEOUT)
+
+
+def _count_facets(jobs, filters):
+    rows = _grouped_counts(jobs)
+    types, exps, days = set(filters['job_type']), set(filters['experience']), filters['posted_within']
+
+    def in_type(row):
+        return not types or row[0] in types
+
+    def in_exp(row):
+        return not exps or row[1] in exps
+
+    def in_age(row, limit):
+        return limit is None or (row[2] is not None and row[2] <= limit)
+
+    type_counts, exp_counts = {}, {}
+    for row in rows:
+        if in_exp(row) and in_age(row, days):
+            type_counts[row[0]] = type_counts.get(row[0], 0) + row[3]
+        if in_type(row) and in_age(row, days):
+            exp_counts[row[1]] = exp_counts.get(row[1], 0) + row[3]
+    age_rows = [row for row in rows if in_type(row) and in_exp(row)]
+
+    facets = {
+        'job_type': [
+            {'value': value, 'label': label, 'count': type_counts.get(value, 0), 'selected': value in types}
+            for value, label in Job.JOB_TYPE_CHOICES
+        ],
+        'experience': [
+            {'value': value, 'label': value, 'count': count, 'selected': value in exps}
+            for value, count in sorted(exp_counts.items())
+        ],
+        'posted_within': [
+            {'value': 'Any', 'label': 'Any', 'count': sum(row[3] for row in age_rows), 'selected': False}
+        ] + [
+            {
+                'value': str(d),
+                'label': label,
+                'count': sum(row[3] for row in age_rows if in_age(row, d)),
+                'selected': d == days,
+            }
+            for d, label in POSTED_WITHIN_CHOICES
+        ],
+    }
+    # Keep experience options that are selected but currently have no jobs
+    for value in sorted(exps - set(exp_counts)):
+        facets['experience'].append({'value': value, 'label': value, 'count': 0, 'selected': True})
+
+    return facets
@@ -0,0 +1,89 @@
+"""The "latest jobs" feed on the home page.
+
+The feed is the same for every visitor, so it is built once and kept in the
+cache together with a version token; home.html caches its rendered job cards
+under that token as well. In steady state neither needs the database.
+
+Job and Company signals drop the feed only when the change can show up in
+it: a job that is (or would now be) among the latest, or a company whose
+name is shown next to one. Expiry is soft: once ``FEED_TTL`` has passed,
+one request rebuilds the feed while the others keep serving the old one.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+
+from .models import Job
+
+FEED_SIZE = 5
+FEED_TTL = 600
+STALE_GRACE = 60
+FEED_KEY = 'home:latest_jobs'
+LOCK_KEY = 'home:latest_jobs:lock'
+LOCK_TIMEOUT = 30
+COLD_WAIT = 1.0
+COLD_POLL = 0.05
+
+
+def _build():
+    jobs = list(Job.objects.select_related('company').order_by('-creation_date', '-id')[:FEED_SIZE])
+    return {
+        'version': uuid.uuid4().hex,
+        'jobs': jobs,
+        'job_ids': {job.pk for job in jobs},
+        'company_ids': {job.company_id for job in jobs},
+        'oldest_date': str(jobs[-1].creation_date) if len(jobs) == FEED_SIZE else None,
+        'expires': time.time() + FEED_TTL,
+    }
+
+
+def _rebuild():
+    try:
+        feed = _build()
+        cache.set(FEED_KEY, feed, FEED_TTL + STALE_GRACE)
+        return feed
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def latest_jobs():
+    """``{'version', 'jobs', ...}`` for the newest ``FEED_SIZE`` jobs."""
+    feed = cache.get(FEED_KEY)
+    if feed is not None:
+        if feed['expires'] <= time.time() and cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+            return _rebuild()
+        return feed
+
+    if cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        return _rebuild()
+    # Someone else is building it; give them a moment before doing it too
+    deadline = time.time() + COLD_WAIT
+    while time.time() < deadline:
+        time.sleep(COLD_POLL)
+        feed = cache.get(FEED_KEY)
+        if feed is not None:
+            return feed
+    return _build()
+
+
+def invalidate():
+    cache.delete(FEED_KEY)
+
+
+def job_changed(pk, creation_date):
+    feed = cache.get(FEED_KEY)
+    if feed is None:
+        return
+    if (
+        pk in feed['job_ids']
+        or feed['oldest_date'] is None
+        or str(creation_date) >= feed['oldest_date']
+    ):
+        invalidate()
+
+
+def company_changed(pk):
+    feed = cache.get(FEED_KEY)
+    if feed is not None and pk in feed['company_ids']:
+        invalidate()
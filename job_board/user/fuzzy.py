@@ -0,0 +1,309 @@
+"""Typo-tolerant job search.
+
+Words from job titles, skills and company names go into a per-process
+vocabulary. Each word is split into padded trigrams ("  py", " py", "pyt",
+...) and every trigram keeps a posting list of the words that contain it, so
+a misspelled query word is matched against the (small) vocabulary rather
+than against every job. Each vocabulary word in turn keeps a posting list of
+the jobs that use it.
+
+Posting lists are ``array('I')`` buffers rather than sets: four bytes per
+entry, and merging them with ``dict.fromkeys`` / ``Counter`` runs in C.
+They are only ever appended to. A job gets a new slot each time it is
+indexed, so higher slots are newer; removing it just marks its old slot
+dead (job id 0), and searches skip dead slots. Once dead slots pass
+``MIN_DEAD_SLOTS`` and outnumber the live jobs the index counts as stale,
+and the rebuild below drops them.
+
+The index is built from the database the first time a worker needs it, kept
+current by the Job signals in this process, and rebuilt after
+``REBUILD_INTERVAL`` seconds so edits made by other workers show up too.
+Rebuilds run on a background thread and the new index is swapped in when
+it is ready; requests keep using the old one meanwhile.
+"""
+import heapq
+import logging
+import threading
+import time
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+from django.db import DatabaseError, connection
+
+from .models import Job
+from .search import TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+# Minimum Jaccard similarity between a query word and an indexed word
+MIN_SIMILARITY = 0.25
+# Closest indexed words considered for each query word
+MAX_CANDIDATES = 10
+# Jobs taken as candidates per query word
+MAX_POSTINGS = 1000
+REBUILD_INTERVAL = 15 * 60
+MIN_DEAD_SLOTS = 1000
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def words(*texts):
+    return {token.lower() for text in texts if text for token in TOKEN_RE.findall(text)}
+
+
+class TrigramIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built_at = None
+        self.term_ids = {}              # word -> term id
+        self.term_sizes = array('H')    # term id -> number of trigrams
+        self.term_jobs = []             # term id -> array('I') of job slots
+        self.gram_terms = {}            # trigram -> array('I') of term ids
+        self.slot_of = {}               # job id -> slot
+        self.job_ids = array('q')       # slot -> job id (0 once removed)
+        self.job_terms = []             # slot -> array('I') of term ids
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    @property
+    def dead_slots(self):
+        return len(self.job_ids) - len(self.slot_of)
+
+    def _term_id(self, word):
+        term = self.term_ids.get(word)
+        if term is None:
+            term = len(self.term_sizes)
+            self.term_ids[word] = term
+            grams = trigrams(word)
+            self.term_sizes.append(min(len(grams), 0xFFFF))
+            self.term_jobs.append(array('I'))
+            for gram in grams:
+                postings = self.gram_terms.get(gram)
+                if postings is None:
+                    postings = self.gram_terms[gram] = array('I')
+                postings.append(term)
+        return term
+
+    def add(self, job_id, *texts):
+        with self._lock:
+            self.remove(job_id)
+            terms = array('I', sorted(self._term_id(word) for word in words(*texts)))
+            slot = len(self.job_ids)
+            self.job_ids.append(job_id)
+            self.job_terms.append(terms)
+            self.slot_of[job_id] = slot
+            for term in terms:
+                self.term_jobs[term].append(slot)
+
+    def remove(self, job_id):
+        with self._lock:
+            slot = self.slot_of.pop(job_id, None)
+            if slot is None:
+                return
+            # Its postings stay; search skips the dead slot
+            self.job_ids[slot] = 0
+            self.job_terms[slot] = array('I')
+
+    def similar_terms(self, word):
+        """(term id, similarity) pairs for indexed words close to ``word``."""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            postings = self.gram_terms.get(gram)
+            if postings:
+                shared.update(postings)
+        sizes = self.term_sizes
+        scored = []
+        for term, common in shared.items():
+            similarity = common / (len(grams) + sizes[term] - common)
+            if similarity >= MIN_SIMILARITY:
+                scored.append((term, similarity))
+        return heapq.nlargest(MAX_CANDIDATES, scored, key=itemgetter(1))
+
+    def search(self, query, limit=50):
+        """
+        Job ids ranked by how closely they match the words in ``query``.
+
+        Candidates come from at most ``MAX_POSTINGS`` postings per query
+        word, taken from its closest terms first and newest jobs first. Each
+        candidate is then scored on all the query words from its own short
+        term list, so common words ("developer") never copy their whole
+        posting lists.
+        """
+        word_terms = [dict(similar) for similar in map(self.similar_terms, words(query)) if similar]
+        if not word_terms:
+            return []
+        candidates = set()
+        for term_scores in word_terms:
+            budget = MAX_POSTINGS
+            for term, _ in sorted(term_scores.items(), key=itemgetter(1), reverse=True):
+                postings = self.term_jobs[term]
+                candidates.update(postings[-budget:] if len(postings) > budget else postings)
+                budget -= len(postings)
+                if budget <= 0:
+                    break
+
+        # term id -> (query word, similarity); a term close to two query
+        # words counts for the closer one
+        closest = {}
+        for position, term_scores in enumerate(word_terms):
+            for term, similarity in term_scores.items():
+                if similarity > closest.get(term, (None, 0))[1]:
+                    closest[term] = (position, similarity)
+        job_ids = self.job_ids
+        job_terms = self.job_terms
+        scored = []
+        for slot in candidates:
+            if not job_ids[slot]:
+                continue
+            best = {}
+            for term in job_terms[slot]:
+                hit = closest.get(term)
+                if hit is not None and hit[1] > best.get(hit[0], 0):
+                    best[hit[0]] = hit[1]
+            # Ties go to the newer job (higher slot)
+            scored.append((sum(best.values()), slot))
+
+        return [job_ids[slot] for _, slot in heapq.nlargest(limit, scored)]
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build an index from ``(job id, *texts)`` rows."""
+        index = cls()
+        for job_id, *texts in rows:
+            index.add(job_id, *texts)
+        index.built_at = time.monotonic()
+        return index
+
+
+# Replaced wholesale on rebuild so readers never see a half-built index
+job_index = TrigramIndex()
+_build_lock = threading.Lock()
+_changes_lock = threading.Lock()
+# Edits made in this process while a rebuild reads the table, replayed onto
+# the new index before it is swapped in; None when no rebuild is running
+_changes = None
+_rebuilding = False
+
+
+def index_rows(queryset):
+    return queryset.values_list('id', 'title', 'skills', 'company__company_name')
+
+
+def _is_fresh(index):
+    if index.built_at is None or time.monotonic() - index.built_at >= REBUILD_INTERVAL:
+        return False
+    dead = index.dead_slots
+    return dead <= MIN_DEAD_SLOTS or dead <= len(index)
+
+
+def rebuild(only_if_stale=False):
+    """Build a new index from the database and swap it in."""
+    global job_index, _changes
+    with _build_lock:
+        if only_if_stale and _is_fresh(job_index):
+            return job_index
+        started = time.monotonic()
+        with _changes_lock:
+            _changes = []
+        try:
+            fresh = TrigramIndex.from_rows(index_rows(Job.objects.all()).iterator(chunk_size=5000))
+        except BaseException:
+            with _changes_lock:
+                _changes = None
+            raise
+        with _changes_lock:
+            for job_id, texts in _changes:
+                if texts is None:
+                    fresh.remove(job_id)
+                else:
+                    fresh.add(job_id, *texts)
+            _changes = None
+            job_index = fresh
+        logger.info("Built fuzzy job index: %d jobs in %.2fs", len(job_index), time.monotonic() - started)
+        return job_index
+
+
+def _rebuild_in_background():
+    global _rebuilding
+    try:
+        rebuild(only_if_stale=True)
+    except DatabaseError as e:
+        logger.warning("Fuzzy job index rebuild failed, keeping the old one: %s", e)
+    finally:
+        _rebuilding = False
+        # This thread's own connection
+        connection.close()
+
+
+def _background_rebuilds():
+    # An in-memory SQLite database (the test runner's) can't be read from
+    # another thread mid-transaction
+    return not (connection.vendor == 'sqlite' and connection.is_in_memory_db())
+
+
+def ensure_built():
+    """
+    The current index. The first build runs in the request that needs it;
+    after that a stale index keeps answering while a background thread
+    builds its replacement, so no request waits for a rebuild.
+    """
+    global _rebuilding
+    index = job_index
+    if index.built_at is None or not _background_rebuilds():
+        return index if _is_fresh(index) else rebuild(only_if_stale=True)
+    if not _is_fresh(index):
+        with _changes_lock:
+            start, _rebuilding = not _rebuilding, True
+        if start:
+            threading.Thread(target=_rebuild_in_background, name='fuzzy-index-rebuild', daemon=True).start()
+    return index
+
+
+def warm_index():
+    """Build the index at worker start; a missing table just defers it."""
+    try:
+        ensure_built()
+    except DatabaseError as e:
+        logger.warning("Fuzzy job index not built at startup: %s", e)
+
+
+def _tracking():
+    # Nothing to keep current until an index exists or is being built
+    return job_index.built_at is not None or _changes is not None
+
+
+def _changed(job_id, texts):
+    with _changes_lock:
+        if _changes is not None:
+            _changes.append((job_id, texts))
+        if job_index.built_at is not None:
+            if texts is None:
+                job_index.remove(job_id)
+            else:
+                job_index.add(job_id, *texts)
+
+
+def index_job(job):
+    if _tracking():
+        _changed(job.id, (job.title, job.skills, job.company.company_name))
+
+
+def index_jobs(queryset):
+    if _tracking():
+        for job_id, *texts in index_rows(queryset):
+            _changed(job_id, texts)
+
+
+def unindex_job(job_id):
+    if _tracking():
+        _changed(job_id, None)
+
+
+def fuzzy_job_ids(query, limit=50):
+    return ensure_built().search(query, limit)
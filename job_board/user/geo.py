@@ -0,0 +1,122 @@
+"""Geocoding and radius search.
+
+Places resolve to coordinates through the ``Centroid`` table, loaded from
+``user/data/centroids.csv`` (or a fuller pincode directory with the same
+columns via ``load_centroids``). Pincodes are matched exactly first and then
+by their 3-digit sorting-district prefix; free-text locations are matched on
+their comma separated parts and words.
+
+Radius queries first narrow jobs to a latitude/longitude bounding box, which
+is served by ``job_geo_idx``, and only compute the haversine distance for the
+rows inside it.
+"""
+import csv
+import math
+import os
+import re
+
+from django.db.models import F
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+from .models import Centroid
+
+CENTROIDS_CSV = os.path.join(os.path.dirname(__file__), 'data', 'centroids.csv')
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.045
+
+PINCODE_RE = re.compile(r'\b(\d{6})\b')
+WORD_RE = re.compile(r'[a-z]+')
+
+
+def read_centroids(path=CENTROIDS_CSV):
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield {
+                'name': row['name'].strip().lower(),
+                'district': row['district'].strip(),
+                'state': row['state'].strip(),
+                'pincode': (row.get('pincode') or '').strip(),
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+            }
+
+
+def _place_names(*texts):
+    # Whole text, then comma separated parts, then single words
+    names = []
+    for text in texts:
+        if not text:
+            continue
+        text = ' '.join(text.lower().split())
+        parts = [part.strip() for part in text.split(',')]
+        for name in [text] + parts + [word for part in parts for word in WORD_RE.findall(part)]:
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def lookup(pincode=None, *places):
+    """(latitude, longitude) for a pincode or place names, or None."""
+    pincodes = []
+    for text in (pincode,) + places:
+        pincodes += PINCODE_RE.findall(text or '')
+    if pincodes:
+        keys = pincodes + [code[:3] for code in pincodes]
+        found = {
+            code: (lat, lon)
+            for code, lat, lon in Centroid.objects.filter(pincode__in=keys).values_list('pincode', 'latitude', 'longitude')
+        }
+        for key in keys:
+            if key in found:
+                return found[key]
+
+    names = _place_names(*places)
+    if names:
+        found = {
+            name: (lat, lon)
+            for name, lat, lon in Centroid.objects.filter(name__in=names).values_list('name', 'latitude', 'longitude')
+        }
+        for name in names:
+            if name in found:
+                return found[name]
+    return None
+
+
+def geocode_job(job):
+    job.latitude, job.longitude = lookup(None, job.location) or (None, None)
+
+
+def geocode_applicant(applicant):
+    applicant.latitude, applicant.longitude = lookup(
+        applicant.pincode, applicant.location, applicant.district, applicant.state,
+    ) or (None, None)
+
+
+def bounding_box(latitude, longitude, km):
+    dlat = km / KM_PER_DEGREE
+    dlon = km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon
+
+
+def distance_expression(latitude, longitude):
+    """Haversine distance in km from (latitude, longitude) to each row."""
+    dlat = Radians(F('latitude') - latitude)
+    dlon = Radians(F('longitude') - longitude)
+    a = (
+        Power(Sin(dlat / 2), 2)
+        + math.cos(math.radians(latitude)) * Cos(Radians(F('latitude'))) * Power(Sin(dlon / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+def within_radius(queryset, latitude, longitude, km):
+    """Rows of ``queryset`` within ``km`` of the point, annotated with ``distance``."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, km)
+    return (
+        queryset.filter(
+            latitude__range=(min_lat, max_lat),
+            longitude__range=(min_lon, max_lon),
+        )
+        .annotate(distance=distance_expression(latitude, longitude))
+        .filter(distance__lte=km)
+    )
@@ -0,0 +1,124 @@
+"""Image derivatives for uploaded pictures.
+
+After an ``Applicant``, ``Company`` or ``Job`` image is uploaded,
+``tasks.make_image_derivatives_task`` stores the original again without
+EXIF data (GPS, camera details) and no larger than ``MAX_DIMENSION``, and
+writes WebP copies at each of ``WIDTHS`` under ``derivatives/``. List pages
+use the ``srcset`` tag from ``image_tags`` to pick the smallest copy that
+is sharp at the size they show, so an 85px avatar no longer downloads a
+full-size screenshot.
+
+Derivatives are found by name, so no extra columns are needed. The
+smallest one is written last, and its existence means the set is
+complete. Whether an image has them is kept in the cache (set when they
+are written, dropped when they are deleted), so a list page doesn't ask
+the storage about every row; only an image not known either way costs a
+lookup, and a "no" is rechecked after ``NOT_READY_TIMEOUT``. Images
+without derivatives (not processed yet, or unreadable) are served as
+uploaded; ``build_image_derivatives`` backfills old uploads.
+"""
+import hashlib
+import io
+import logging
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .storage import media_storage, replace_references
+
+logger = logging.getLogger(__name__)
+
+MAX_DIMENSION = 2048
+WIDTHS = (96, 192, 480)
+WEBP_QUALITY = 80
+NOT_READY_TIMEOUT = 300
+
+
+def derivative_name(name, width):
+    # The original's extension stays in, so logo.png and logo.jpg get a set each
+    return f'derivatives/{name}.{width}.webp'
+
+
+def _ready_key(name):
+    return 'images:derivative-set:' + hashlib.md5(name.encode()).hexdigest()
+
+
+def has_derivatives(name):
+    ready = cache.get(_ready_key(name))
+    if ready is None:
+        ready = default_storage.exists(derivative_name(name, min(WIDTHS)))
+        cache.set(_ready_key(name), ready, None if ready else NOT_READY_TIMEOUT)
+    return ready
+
+
+def derivative_urls(name):
+    """``{width: url}`` for an image's derivatives, or None until they exist."""
+    if not has_derivatives(name):
+        return None
+    return {width: default_storage.url(derivative_name(name, width)) for width in WIDTHS}
+
+
+def _save(name, data):
+    # Derivative names are fixed, so a rebuild overwrites them
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(data))
+
+
+def _encode(image, format, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+def _clean_original(name, image):
+    """Store the upload again without metadata and within MAX_DIMENSION, if it needs it."""
+    oversized = max(image.size) > MAX_DIMENSION
+    if not (oversized or image.getexif() or image.info.get('exif')):
+        return name, image
+    if getattr(image, 'is_animated', False):
+        # Re-encoding would keep only the first frame
+        return name, image
+
+    cleaned = ImageOps.exif_transpose(image)
+    cleaned.thumbnail((MAX_DIMENSION, MAX_DIMENSION))
+    params = {'quality': 90} if image.format in ('JPEG', 'WEBP', 'AVIF') else {}
+    # Pillow only writes EXIF when asked to, so re-encoding drops it
+    cleaned_name = media_storage().save(name, ContentFile(_encode(cleaned, image.format, **params)))
+    # Content-addressed: new bytes, new name, so the rows move over to it
+    replace_references(name, cleaned_name)
+    return cleaned_name, cleaned
+
+
+def make_derivatives(name):
+    """
+    Clean an uploaded image and write its WebP derivatives. Returns the
+    image's name after cleaning, or None if it can't be read.
+    """
+    try:
+        with media_storage().open(name) as f:
+            image = Image.open(f)
+            image.load()
+    except (FileNotFoundError, UnidentifiedImageError, OSError) as e:
+        logger.warning("Can't make derivatives of %s: %s", name, e)
+        return None
+
+    name, image = _clean_original(name, image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+
+    # Largest first: the smallest one marks the set as complete
+    for width in sorted(WIDTHS, reverse=True):
+        copy = image.copy()
+        copy.thumbnail((width, width))
+        _save(derivative_name(name, width), _encode(copy, 'WEBP', quality=WEBP_QUALITY, method=6))
+    cache.set(_ready_key(name), True, None)
+    return name
+
+
+def delete_derivatives(name):
+    cache.delete(_ready_key(name))
+    for width in WIDTHS:
+        default_storage.delete(derivative_name(name, width))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from user import images
+from user.models import Applicant, Company, Job
+
+
+class Command(BaseCommand):
+    help = "Strip, cap and make WebP derivatives of uploaded images that don't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rebuild derivatives that already exist.")
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in (Applicant, Company, Job):
+            names.update(model.objects.exclude(image='').exclude(image=None).values_list('image', flat=True))
+
+        built = failed = 0
+        for name in sorted(names):
+            if not options['force'] and images.has_derivatives(name):
+                continue
+            if images.make_derivatives(name):
+                built += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f"Built derivatives for {built} images ({failed} unreadable)."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from user import matching
+
+
+class Command(BaseCommand):
+    help = "Rebuild the memory-mapped job and applicant feature matrices used for matching."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        matching.rebuild_vectors(batch_size=options['batch_size'])
+        job_ids, _ = matching.job_vectors.load()
+        applicant_ids, _ = matching.applicant_vectors.load()
+        self.stdout.write(self.style.SUCCESS(
+            f"Encoded {int((job_ids != 0).sum())} jobs and {int((applicant_ids != 0).sum())} applicants."
+        ))
@@ -0,0 +1,24 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from user.caching import METRIC_NAMES, METRICS_PREFIX, metrics
+
+
+class Command(BaseCommand):
+    help = "Print cache hit/miss/eviction counters summed over all processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters afterwards.")
+
+    def handle(self, *args, **options):
+        shared = caches[caches['default'].shared_alias]
+        totals = metrics.totals(shared)
+        width = max(len(name) for name in METRIC_NAMES)
+        for name in METRIC_NAMES:
+            self.stdout.write(f"{name:<{width}}  {totals[name]}")
+        for tier in ('local', 'shared'):
+            lookups = totals[f'{tier}_hits'] + totals[f'{tier}_misses']
+            if lookups:
+                self.stdout.write(f"{tier} hit rate: {totals[f'{tier}_hits'] / lookups:.1%}")
+        if options['reset']:
+            shared.delete_many([f'{METRICS_PREFIX}:{name}' for name in METRIC_NAMES])
@@ -0,0 +1,73 @@
+import hashlib
+import os
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+
+from user import storage
+
+# Upload directories from before content-addressed storage
+LEGACY_DIRS = ('media', 'companies', 'jobs', 'resumes')
+
+
+def _digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        "Move uploads from the old per-model directories into content-addressed storage, "
+        "one copy per distinct file, and repoint the rows that use them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be saved.")
+        parser.add_argument(
+            '--prune', action='store_true',
+            help="Also delete blobs unreferenced for longer than MEDIA_PRUNE_GRACE seconds.",
+        )
+
+    def legacy_files(self, media):
+        for directory in LEGACY_DIRS:
+            for root, _, files in os.walk(media.path(directory)):
+                for filename in sorted(files):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, media.path('')).replace(os.sep, '/'), path
+
+    def handle(self, *args, **options):
+        media = storage.media_storage()
+        files = list(self.legacy_files(media))
+
+        if options['dry_run']:
+            copies = defaultdict(list)
+            for name, path in files:
+                copies[_digest(path)].append(os.path.getsize(path))
+            duplicate_bytes = sum(sum(sizes[1:]) for sizes in copies.values())
+            self.stdout.write(
+                f"{len(files)} files, {len(copies)} distinct; "
+                f"deduplicating would free {duplicate_bytes} bytes."
+            )
+            return
+
+        moved = rows = 0
+        for name, path in files:
+            with open(path, 'rb') as f:
+                blob = media.save(name, File(f))
+            with transaction.atomic():
+                rows += storage.replace_references(name, blob)
+            os.remove(path)
+            moved += 1
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} files into blob storage and repointed {rows} rows."))
+
+        if options['prune']:
+            blobs, freed = storage.prune(now() - timedelta(seconds=settings.MEDIA_PRUNE_GRACE))
+            self.stdout.write(self.style.SUCCESS(f"Pruned {blobs} unreferenced blobs ({freed} bytes)."))
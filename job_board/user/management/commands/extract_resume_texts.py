@@ -0,0 +1,39 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from user import resume_text
+from user.storage import media_storage
+
+
+class Command(BaseCommand):
+    help = "Extract and index the text of stored CVs that haven't been processed yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Processes in the pool (default: CPU count).")
+        parser.add_argument('--max-pending', type=int, default=32, help="Most files handed to the pool at once.")
+
+    def handle(self, *args, **options):
+        names = iter(resume_text.unextracted_files())
+        vocabulary = resume_text.skill_vocabulary()
+        storage = media_storage()
+        counts = {}
+
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            pending = {}
+            while True:
+                # Keep at most max_pending files in flight, so memory stays flat
+                for name in names:
+                    pending[pool.submit(resume_text.read_and_extract, storage.path(name), name)] = name
+                    if len(pending) >= options['max_pending']:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    status, text, error = future.result()
+                    resume_text.save_result(pending.pop(future), status, text, error, vocabulary)
+                    counts[status] = counts.get(status, 0) + 1
+
+        summary = ', '.join(f"{n} {status}" for status, n in sorted(counts.items())) or "nothing to do"
+        self.stdout.write(self.style.SUCCESS(f"Extracted CV text: {summary}."))
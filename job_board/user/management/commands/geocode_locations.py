@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from user.geo import geocode_applicant, geocode_job
+from user.models import Applicant, Job
+
+
+class Command(BaseCommand):
+    help = "Backfill latitude/longitude on jobs and applicants from their location fields."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true', help="Re-geocode rows that already have coordinates.")
+
+    def _backfill(self, queryset, geocode, batch_size):
+        if not self.options['all']:
+            queryset = queryset.filter(latitude__isnull=True)
+        batch, located = [], 0
+        for obj in queryset.iterator(chunk_size=batch_size):
+            geocode(obj)
+            located += obj.latitude is not None
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                queryset.model.objects.bulk_update(batch, ['latitude', 'longitude'])
+                batch = []
+        queryset.model.objects.bulk_update(batch, ['latitude', 'longitude'])
+        return located
+
+    def handle(self, *args, **options):
+        self.options = options
+        jobs = self._backfill(Job.objects.all(), geocode_job, options['batch_size'])
+        applicants = self._backfill(Applicant.objects.all(), geocode_applicant, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Located {jobs} jobs and {applicants} applicants."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from user.geo import CENTROIDS_CSV, read_centroids
+from user.models import Centroid
+
+
+class Command(BaseCommand):
+    help = "Replace the pincode/district centroid table from a CSV (name,district,state,pincode,latitude,longitude)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=CENTROIDS_CSV)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Centroid.objects.all().delete()
+            centroids = Centroid.objects.bulk_create(
+                (Centroid(**row) for row in read_centroids(options['path'])),
+                batch_size=1000,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(centroids)} centroids."))
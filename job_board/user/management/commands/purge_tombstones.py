@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from user import delta
+
+
+class Command(BaseCommand):
+    help = "Delete deleted-application records older than DELTA_TOMBSTONE_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.DELTA_TOMBSTONE_DAYS)
+
+    def handle(self, *args, **options):
+        purged = delta.purge_tombstones(now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} tombstones."))
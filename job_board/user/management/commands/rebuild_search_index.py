@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from user import search
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the job full-text search index from the Job table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.uses_fts():
+            self.stdout.write(
+                f"{connection.vendor} ranks jobs with a computed tsvector; there is no index table to rebuild."
+            )
+            return
+        total = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} jobs."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from user import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized job and application counts on Company and Job."
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {fixed} rows."))
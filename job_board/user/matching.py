@@ -0,0 +1,478 @@
+"""Candidate / job matching.
+
+Applicants and jobs are encoded into fixed-width float32 vectors made of
+weighted, L2-normalized blocks:
+
+* skills      - hashed skill and keyword tokens (job skills + title,
+                applicant work/about text and CV skills)
+* location    - hashed place tokens; work-from-home jobs match everyone
+* experience  - soft one-hot over experience buckets
+* education   - one-hot education level
+
+so the dot product of two vectors is the weighted sum of per-block cosine
+similarities. Scoring every pair is then a matrix product, and the top K
+come from ``np.argpartition``.
+
+Vectors live in ``VectorStore`` files under ``settings.MATCHING_DIR``: a raw
+float32 matrix and an id column, both memory-mapped, so every worker shares
+one copy through the page cache. Rows are updated in place as jobs and
+applicants change; the files are only rewritten, a chunk of rows at a time,
+when they need to grow or are rebuilt.
+"""
+import fcntl
+import itertools
+import json
+import os
+import re
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from .models import Applicant, Job, Resume, ResumeText
+from .search import TOKEN_RE
+from .skills import canonical_skill, parse_skills
+
+SKILL_DIM = 256
+LOCATION_DIM = 64
+EXPERIENCE_BUCKETS = (0, 1, 3, 6, 10)   # lower bounds, in years
+EDUCATION_LEVELS = [value for value, _ in Applicant.EDUCATION_CHOICES]
+
+BLOCK_WEIGHTS = {
+    'skills': 0.6,
+    'location': 0.25,
+    'experience': 0.1,
+    'education': 0.05,
+}
+BLOCKS = [
+    ('skills', SKILL_DIM),
+    ('location', LOCATION_DIM),
+    ('experience', len(EXPERIENCE_BUCKETS)),
+    ('education', len(EDUCATION_LEVELS)),
+]
+DIM = sum(size for _, size in BLOCKS)
+
+REMOTE_TOKEN = '__remote__'
+STOPWORDS = {
+    'a', 'an', 'and', 'as', 'at', 'for', 'from', 'in', 'of', 'on', 'or', 'the', 'to', 'with',
+    'i', 'my', 'we', 'our', 'worked', 'working', 'work', 'years', 'year', 'experience',
+}
+EDUCATION_KEYWORDS = {
+    'diploma': re.compile(r'\bdiploma\b', re.I),
+    'graduate': re.compile(r'\b(graduate|degree|b\.?tech|b\.?e|bsc|b\.?com|bca|ba)\b', re.I),
+    'post_graduate': re.compile(r'\b(post ?graduate|pg|m\.?tech|mba|msc|mca|m\.?com|ma)\b', re.I),
+    'iti': re.compile(r'\biti\b', re.I),
+}
+NUMBER_RE = re.compile(r'\d+')
+
+STORE_GROWTH = 2
+STORE_MIN_CAPACITY = 1024
+# Rows copied at a time when the store is rewritten
+STORE_CHUNK = 2000
+
+
+def _bucket(token, size):
+    return zlib.crc32(token.encode()) % size
+
+
+def _hashed(tokens, size):
+    vector = np.zeros(size, dtype=np.float32)
+    for token in tokens:
+        vector[_bucket(token, size)] += 1.0
+    return vector
+
+
+def _keywords(*texts):
+    tokens = set()
+    for text in texts:
+        if text:
+            tokens.update(
+                canonical_skill(word) for word in TOKEN_RE.findall(text.lower()) if word not in STOPWORDS
+            )
+    return tokens
+
+
+def _experience(years):
+    vector = np.zeros(len(EXPERIENCE_BUCKETS), dtype=np.float32)
+    if years is None:
+        return vector
+    index = max(i for i, low in enumerate(EXPERIENCE_BUCKETS) if years >= low)
+    vector[index] = 1.0
+    # Neighbouring buckets are a partial fit
+    for neighbour in (index - 1, index + 1):
+        if 0 <= neighbour < len(vector):
+            vector[neighbour] = 0.5
+    return vector
+
+
+def _assemble(blocks):
+    parts = []
+    for name, size in BLOCKS:
+        block = blocks.get(name)
+        if block is None:
+            block = np.zeros(size, dtype=np.float32)
+        norm = np.linalg.norm(block)
+        if norm:
+            block = block / norm * np.sqrt(BLOCK_WEIGHTS[name])
+        parts.append(block)
+    return np.concatenate(parts).astype(np.float32)
+
+
+def job_years(job):
+    text = (job.experience or '').lower()
+    if 'fresher' in text:
+        return 0
+    numbers = NUMBER_RE.findall(text)
+    return int(numbers[0]) if numbers else None
+
+
+def applicant_years(applicant):
+    # Applicant.year is the passing-out year
+    try:
+        passed_out = int(applicant.year)
+    except (TypeError, ValueError):
+        return None
+    return max(date.today().year - passed_out, 0)
+
+
+def with_cv_skills(queryset):
+    """
+    Annotate applicants with ``cv_skills``: the skills ``user.resume_text``
+    found in their latest CV version, or None until it has been extracted.
+    """
+    latest = Resume.objects.filter(applicant=OuterRef(OuterRef('pk'))).order_by('-uploaded_at', '-id')
+    texts = ResumeText.objects.filter(status=ResumeText.DONE, file=Subquery(latest.values('file')[:1]))
+    return queryset.annotate(cv_skills=Subquery(texts.values('skills')[:1]))
+
+
+def cv_skills(applicant):
+    if hasattr(applicant, 'cv_skills'):
+        skills = applicant.cv_skills
+    else:
+        # Not loaded through with_cv_skills(): one query
+        skills = with_cv_skills(Applicant.objects.filter(pk=applicant.pk)).values_list('cv_skills', flat=True).first()
+    return parse_skills(skills or '')
+
+
+def applicant_skills(applicant):
+    """Skill tokens for an applicant: their work/about text plus the skills in their latest CV."""
+    return _keywords(applicant.work, applicant.about) | set(parse_skills(applicant.work or '')) | set(cv_skills(applicant))
+
+
+def encode_job(job):
+    skills = set(parse_skills(job.skills)) | _keywords(job.skills, job.title)
+    if job.work_location == Job.HOME:
+        location = [REMOTE_TOKEN]
+    else:
+        location = _keywords(job.location)
+    text = ' '.join(filter(None, [job.title, job.description, job.experience]))
+    education = np.array(
+        [1.0 if EDUCATION_KEYWORDS[level].search(text) else 0.0 for level in EDUCATION_LEVELS],
+        dtype=np.float32,
+    )
+    return _assemble({
+        'skills': _hashed(skills, SKILL_DIM),
+        'location': _hashed(location, LOCATION_DIM),
+        'experience': _experience(job_years(job)),
+        'education': education,
+    })
+
+
+def encode_applicant(applicant):
+    places = _keywords(applicant.location, applicant.district, applicant.state, applicant.pincode)
+    places.add(REMOTE_TOKEN)
+    education = np.array(
+        [1.0 if applicant.education_level == level else 0.0 for level in EDUCATION_LEVELS],
+        dtype=np.float32,
+    )
+    return _assemble({
+        'skills': _hashed(applicant_skills(applicant), SKILL_DIM),
+        'location': _hashed(places, LOCATION_DIM),
+        'experience': _experience(applicant_years(applicant)),
+        'education': education,
+    })
+
+
+class VectorStore:
+    """
+    Row-addressable float32 vectors persisted as ``<name>.<generation>.f32``
+    (raw matrix, ``capacity x DIM``) plus ``<name>.<generation>.ids.npy``
+    (int64 ids, 0 = free row) and ``<name>.json`` (capacity, the current
+    generation, and a version bumped on every write). Replacing the store
+    writes a new generation and then switches ``<name>.json`` over to it,
+    so readers always open a matrix and an id column that belong together;
+    they re-map the files when the version changes.
+    """
+
+    def __init__(self, name, directory=None):
+        self.directory = directory or settings.MATCHING_DIR
+        self.name = name
+        self._version = None
+        self._matrix = None
+        self._ids = None
+        self._rows = None
+
+    def _path(self, suffix):
+        return os.path.join(self.directory, self.name + suffix)
+
+    def _data_paths(self, generation):
+        # Stores written before generations existed use the bare name
+        stem = f'.{generation}' if generation else ''
+        return self._path(stem + '.f32'), self._path(stem + '.ids.npy')
+
+    def _read_meta(self):
+        try:
+            with open(self._path('.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, meta):
+        tmp = self._path('.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path('.json'))
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path('.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _open(self, mode='r'):
+        meta = self._read_meta()
+        if meta is None:
+            return None, None, None
+        matrix_path, ids_path = self._data_paths(meta.get('generation'))
+        matrix = np.memmap(matrix_path, dtype=np.float32, mode=mode, shape=(meta['capacity'], DIM))
+        ids = np.load(ids_path, mmap_mode=mode)
+        return meta, matrix, ids
+
+    def load(self):
+        """(ids, matrix) memory-mapped read-only; re-mapped after a rewrite."""
+        meta = self._read_meta()
+        if meta is None:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, DIM), dtype=np.float32)
+        if meta['version'] != self._version:
+            try:
+                meta, self._matrix, self._ids = self._open('r')
+            except FileNotFoundError:
+                # Replaced between reading the metadata and opening its files
+                return self.load()
+            self._rows = None
+            self._version = meta['version']
+        return self._ids, self._matrix
+
+    def version(self):
+        """Bumped by every write; 0 before the store exists."""
+        meta = self._read_meta()
+        return meta['version'] if meta else 0
+
+    def rows(self):
+        ids, _ = self.load()
+        if self._rows is None:
+            self._rows = {int(pk): row for row, pk in enumerate(ids) if pk}
+        return self._rows
+
+    def vector(self, pk):
+        """The stored vector for ``pk``, or None."""
+        row = self.rows().get(pk)
+        return None if row is None else np.array(self._matrix[row])
+
+    def _write_generation(self, chunks, capacity=0):
+        """
+        Write ``(ids, vectors)`` chunks to a new generation's files, one
+        chunk at a time; the matrix is sized for ``capacity`` rows up front
+        and grown if they don't fit. Returns ``(generation, capacity)``.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        generation = uuid.uuid4().hex[:12]
+        matrix_path, ids_path = self._data_paths(generation)
+        capacity = max(STORE_MIN_CAPACITY, capacity)
+        ids = np.zeros(capacity, dtype=np.int64)
+        try:
+            matrix = np.memmap(matrix_path, dtype=np.float32, mode='w+', shape=(capacity, DIM))
+            filled = 0
+            for chunk_ids, chunk in chunks:
+                end = filled + len(chunk_ids)
+                if end > capacity:
+                    capacity = max(int(capacity * STORE_GROWTH), end)
+                    matrix.flush()
+                    del matrix
+                    os.truncate(matrix_path, capacity * DIM * np.dtype(np.float32).itemsize)
+                    matrix = np.memmap(matrix_path, dtype=np.float32, mode='r+', shape=(capacity, DIM))
+                    ids = np.concatenate([ids, np.zeros(capacity - len(ids), dtype=np.int64)])
+                ids[filled:end] = chunk_ids
+                matrix[filled:end] = chunk
+                filled = end
+            matrix.flush()
+            del matrix
+            np.save(ids_path, ids)
+        except BaseException:
+            for path in (matrix_path, ids_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        return generation, capacity
+
+    def _publish(self, generation, capacity):
+        """Switch readers to a written generation and delete the one it replaces. Hold the write lock."""
+        meta = self._read_meta()
+        self._write_meta({
+            'capacity': capacity, 'generation': generation, 'version': (meta['version'] if meta else 0) + 1,
+        })
+        if meta is not None:
+            # Readers that have the old files mapped keep them until they re-map
+            for path in self._data_paths(meta.get('generation')):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def rebuild(self, pairs, count=0, chunk_size=STORE_CHUNK):
+        """
+        Replace the store with ``(id, vector)`` pairs, ``chunk_size`` at a
+        time so only one chunk is in memory. ``count``, when known, sizes
+        the new files up front.
+        """
+        generation, capacity = self._write_generation(_chunks(pairs, chunk_size), count)
+        with self._write_lock():
+            self._publish(generation, capacity)
+
+    def upsert(self, pairs):
+        """Write vectors in place, appending new ids; grows the files when full."""
+        if not pairs:
+            return
+        with self._write_lock():
+            meta, matrix, ids = self._open('r+')
+            if meta is None:
+                self._publish(*self._write_generation([]))
+                meta, matrix, ids = self._open('r+')
+            rows = {int(pk): row for row, pk in enumerate(ids) if pk}
+            free = [row for row in np.flatnonzero(ids == 0)]
+            new = [pk for pk, _ in pairs if pk not in rows]
+            if len(new) > len(free):
+                used = np.flatnonzero(ids)
+                capacity = max(int(meta['capacity'] * STORE_GROWTH), len(used) + len(new))
+                chunks = (
+                    (ids[used[start:start + STORE_CHUNK]], matrix[used[start:start + STORE_CHUNK]])
+                    for start in range(0, len(used), STORE_CHUNK)
+                )
+                self._publish(*self._write_generation(chunks, capacity))
+                del matrix, ids
+                meta, matrix, ids = self._open('r+')
+                rows = {int(pk): row for row, pk in enumerate(ids) if pk}
+                free = [row for row in np.flatnonzero(ids == 0)]
+            free.reverse()
+            for pk, vector in pairs:
+                row = rows.get(pk)
+                if row is None:
+                    row = rows[pk] = free.pop()
+                    ids[row] = pk
+                matrix[row] = vector
+            matrix.flush()
+            ids.flush()
+            # Same files, new rows: readers must rebuild their id -> row map
+            self._write_meta({**meta, 'version': meta['version'] + 1})
+
+    def delete(self, pks):
+        with self._write_lock():
+            meta, matrix, ids = self._open('r+')
+            if meta is None:
+                return
+            doomed = np.flatnonzero(np.isin(ids, list(pks)))
+            if not len(doomed):
+                return
+            ids[doomed] = 0
+            matrix[doomed] = 0
+            matrix.flush()
+            ids.flush()
+            self._write_meta({**meta, 'version': meta['version'] + 1})
+
+
+def _chunks(pairs, size):
+    """``(ids, vectors)`` arrays for up to ``size`` of the ``(id, vector)`` pairs at a time."""
+    pairs = iter(pairs)
+    while chunk := list(itertools.islice(pairs, size)):
+        yield np.array([pk for pk, _ in chunk], dtype=np.int64), np.stack([vector for _, vector in chunk])
+
+
+job_vectors = VectorStore('jobs')
+applicant_vectors = VectorStore('applicants')
+
+
+def top_k(queries, ids, matrix, k, exclude=(), batch_size=65536):
+    """
+    For each query vector, the ``k`` best (id, score) pairs from ``matrix``.
+    Rows are scored ``batch_size`` at a time so memory stays bounded.
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    live = ids != 0
+    if exclude:
+        live &= ~np.isin(ids, list(exclude))
+    candidates = np.flatnonzero(live)
+    if not len(candidates) or k <= 0:
+        return [[] for _ in range(len(queries))]
+
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(candidates), batch_size):
+        rows = candidates[start:start + batch_size]
+        scores = np.concatenate([best_scores, queries @ matrix[rows].T], axis=1)
+        rows = np.concatenate([best_rows, np.broadcast_to(rows, (len(queries), len(rows)))], axis=1)
+        if scores.shape[1] > k:
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, keep, axis=1)
+            rows = np.take_along_axis(rows, keep, axis=1)
+        best_scores, best_rows = scores, rows
+
+    order = np.argsort(-best_scores, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_rows = np.take_along_axis(best_rows, order, axis=1)
+    return [
+        [(int(ids[row]), float(score)) for row, score in zip(best_rows[q], best_scores[q]) if score > 0]
+        for q in range(len(queries))
+    ]
+
+
+def recommend_jobs(applicant, k=5, exclude=()):
+    """Job ids best matching ``applicant``, best first."""
+    query = applicant_vectors.vector(applicant.pk)
+    if query is None:
+        query = encode_applicant(applicant)
+    ids, matrix = job_vectors.load()
+    return [pk for pk, _ in top_k(query, ids, matrix, k, exclude)[0]]
+
+
+def top_candidates(job, k=5):
+    """Applicant ids best matching ``job``, best first."""
+    ids, matrix = applicant_vectors.load()
+    return [pk for pk, _ in top_k(encode_job(job), ids, matrix, k)[0]]
+
+
+def applicants_with_cv(name):
+    """(id, vector) pairs for the applicants whose CV versions include the stored file ``name``."""
+    applicants = with_cv_skills(Applicant.objects.filter(pk__in=Resume.objects.filter(file=name).values('applicant')))
+    return [(applicant.id, encode_applicant(applicant)) for applicant in applicants]
+
+
+def rebuild_vectors(batch_size=2000):
+    jobs = Job.objects.all()
+    job_vectors.rebuild(
+        ((job.id, encode_job(job)) for job in jobs.iterator(chunk_size=batch_size)),
+        count=jobs.count(), chunk_size=batch_size,
+    )
+    applicants = Applicant.objects.all()
+    applicant_vectors.rebuild(
+        (
+            (applicant.id, encode_applicant(applicant))
+            for applicant in with_cv_skills(applicants).iterator(chunk_size=batch_size)
+        ),
+        count=applicants.count(), chunk_size=batch_size,
+    )
@@ -0,0 +1,186 @@
+"""Serve uploaded media after checking who may see it.
+
+Pictures (``Applicant``, ``Company`` and ``Job`` images and their
+derivatives) are public. CVs are not. A candidate sees their own
+(``Resume.file``, ``Application.resume``, ``Applicant.cv``). A company sees
+the CVs sent with applications to its jobs, plus candidates' profile CVs.
+Staff see everything. Any other name under ``MEDIA_ROOT``, including files
+no row points at and export files (those have their own view), is a 404,
+as is a CV the user may not see.
+
+The check is one indexed query, and none for derivatives. After it, the
+bytes are not sent by Python when ``MEDIA_ACCEL`` names a front-end
+server:
+
+* ``x-accel-redirect`` (nginx): the response carries
+  ``X-Accel-Redirect: <MEDIA_ACCEL_PREFIX><name>`` and nginx serves the file
+  from an ``internal`` location, ranges and conditional requests
+  included::
+
+      location /protected-media/ {
+          internal;
+          alias /srv/job_board/;   # MEDIA_ROOT
+      }
+
+* ``x-sendfile`` (Apache mod_xsendfile, lighttpd): the response carries
+  the file's absolute path in ``X-Sendfile``.
+
+Without one (local development) the file goes out as a ``FileResponse``.
+A WSGI server with ``wsgi.file_wrapper`` (gunicorn, uWSGI) passes the whole
+file to ``sendfile()``. Single ``Range: bytes=`` requests get a 206 with
+just that slice.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.static import was_modified_since
+
+from .models import Applicant, Application, Company, Job, Resume
+from .storage import BLOB_DIR
+
+DERIVATIVE_DIR = 'derivatives'
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+PUBLIC_MAX_AGE = 60 * 60
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_public(name):
+    if name.startswith(DERIVATIVE_DIR + '/'):
+        # Only ever made from the public image fields
+        return True
+    return Applicant.objects.filter(image=name).values('pk').union(
+        Company.objects.filter(image=name).values('pk'),
+        Job.objects.filter(image=name).values('pk'),
+    ).exists()
+
+
+def can_view_private(request, name):
+    user = request.user
+    if not user.is_authenticated:
+        return False
+    resumes = Resume.objects.filter(file=name)
+    applications = Application.objects.filter(resume=name)
+    profile_cvs = Applicant.objects.filter(cv=name)
+    if not user.is_staff:
+        resumes = resumes.filter(applicant__user=user)
+        applications = applications.filter(Q(applicant__user=user) | Q(job__company__user=user))
+        if not request.user_role.is_company:
+            profile_cvs = profile_cvs.filter(user=user)
+    return resumes.values('pk').union(applications.values('pk'), profile_cvs.values('pk')).exists()
+
+
+class FileRange:
+    """The ``length`` bytes of an open file from ``start``, for FileResponse."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def requested_range(request, size, last_modified):
+    """(start, length) of a single satisfiable byte range, None for the whole file, or ValueError."""
+    header = request.headers.get('Range')
+    if not header:
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and parse_http_date_safe(if_range) != int(last_modified):
+        # The client's partial copy is of an older version
+        return None
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        # Several ranges, or units other than bytes: send the whole file
+        return None
+    first, last = match.groups()
+    if first == '':
+        # "-500": the last 500 bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end - start + 1
+
+
+def accelerated_response(name, fullpath):
+    response = HttpResponse()
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response.headers['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+    else:
+        response.headers['X-Sendfile'] = fullpath
+    # The front-end server sets the type from the file; don't let Django's default win
+    del response.headers['Content-Type']
+    return response
+
+
+def file_response(request, fullpath, statobj):
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    try:
+        byte_range = requested_range(request, statobj.st_size, statobj.st_mtime)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f'bytes */{statobj.st_size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+    else:
+        start, length = byte_range
+        response = FileResponse(FileRange(open(fullpath, 'rb'), start, length), content_type=content_type, status=206)
+        response.headers['Content-Length'] = length
+        response.headers['Content-Range'] = f'bytes {start}-{start + length - 1}/{statobj.st_size}'
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve(request, path):
+    name = posixpath.normpath(path).lstrip('/')
+    if not name or name.startswith('.'):
+        raise Http404
+    public = is_public(name)
+    if not public and not can_view_private(request, name):
+        raise Http404
+    # Paths escaping MEDIA_ROOT raise SuspiciousFileOperation (a 400)
+    fullpath = safe_join(settings.MEDIA_ROOT, name)
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    statobj = os.stat(fullpath)
+    if not was_modified_since(request.headers.get('If-Modified-Since'), statobj.st_mtime):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_ACCEL:
+        response = accelerated_response(name, fullpath)
+    else:
+        response = file_response(request, fullpath, statobj)
+    response.headers['Last-Modified'] = http_date(statobj.st_mtime)
+
+    if not public:
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Cookie',))
+    elif name.startswith(BLOB_DIR + '/'):
+        # Named after their content, so they never change
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=PUBLIC_MAX_AGE)
+    return response
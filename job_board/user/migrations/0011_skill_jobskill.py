@@ -0,0 +1,103 @@
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# user.skills.parse_skills as of this migration, so later changes to it
+# don't change what this backfill does
+SEPARATOR_RE = re.compile(r'[,;/|\n\r\t•]+|\s+(?:and|&)\s+', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+SKILL_ALIASES = {
+    'js': 'javascript',
+    'java script': 'javascript',
+    'ecmascript': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'python3': 'python',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'react js': 'react',
+    'node': 'node.js',
+    'nodejs': 'node.js',
+    'node js': 'node.js',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'angularjs': 'angular',
+    'angular.js': 'angular',
+    'golang': 'go',
+    'postgres': 'postgresql',
+    'psql': 'postgresql',
+    'mongo': 'mongodb',
+    'ms sql': 'sql server',
+    'mssql': 'sql server',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'c sharp': 'c#',
+    'csharp': 'c#',
+    'cpp': 'c++',
+    'html5': 'html',
+    'css3': 'css',
+    'ms excel': 'excel',
+    'microsoft excel': 'excel',
+    'ms word': 'word',
+    'microsoft word': 'word',
+    'drf': 'django rest framework',
+}
+MAX_SKILL_LENGTH = 100
+
+
+def parse_skills(text):
+    names = []
+    for part in SEPARATOR_RE.split(text or ''):
+        name = SPACE_RE.sub(' ', part.lower()).lstrip('- ').rstrip('.- ')
+        name = SKILL_ALIASES.get(name, name)[:MAX_SKILL_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill_job_skills(apps, schema_editor):
+    Job = apps.get_model('user', 'Job')
+    Skill = apps.get_model('user', 'Skill')
+    JobSkill = apps.get_model('user', 'JobSkill')
+
+    parsed = {job_id: parse_skills(text) for job_id, text in Job.objects.values_list('id', 'skills')}
+    names = {name for skills in parsed.values() for name in skills}
+    Skill.objects.bulk_create([Skill(name=name) for name in sorted(names)], ignore_conflicts=True)
+    skill_ids = dict(Skill.objects.values_list('name', 'id'))
+    JobSkill.objects.bulk_create(
+        [JobSkill(job_id=job_id, skill_id=skill_ids[name]) for job_id, skills in parsed.items() for name in skills],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0010_add_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_skills', to='user.job')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_skills', to='user.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill', 'job'], name='jobskill_skill_idx')],
+                'constraints': [models.UniqueConstraint(fields=('job', 'skill'), name='unique_job_skill')],
+            },
+        ),
+        migrations.RunPython(backfill_job_skills, migrations.RunPython.noop),
+    ]
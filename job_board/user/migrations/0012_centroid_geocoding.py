@@ -0,0 +1,134 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:53
+
+from django.db import migrations, models
+
+# user/data/centroids.csv as of this migration: (name, district, state,
+# pincode, latitude, longitude). Later edits to the file load through
+# manage.py load_centroids instead of changing what this migration does.
+CENTROIDS = [
+    ('thiruvananthapuram', 'Thiruvananthapuram', 'Kerala', '695', 8.5241, 76.9366),
+    ('trivandrum', 'Thiruvananthapuram', 'Kerala', '', 8.5241, 76.9366),
+    ('kollam', 'Kollam', 'Kerala', '691', 8.8932, 76.6141),
+    ('quilon', 'Kollam', 'Kerala', '', 8.8932, 76.6141),
+    ('pathanamthitta', 'Pathanamthitta', 'Kerala', '689', 9.2648, 76.787),
+    ('alappuzha', 'Alappuzha', 'Kerala', '688', 9.4981, 76.3388),
+    ('alleppey', 'Alappuzha', 'Kerala', '', 9.4981, 76.3388),
+    ('kottayam', 'Kottayam', 'Kerala', '686', 9.5916, 76.5222),
+    ('idukki', 'Idukki', 'Kerala', '685', 9.8497, 76.9719),
+    ('ernakulam', 'Ernakulam', 'Kerala', '682', 9.9816, 76.2999),
+    ('kochi', 'Ernakulam', 'Kerala', '', 9.9312, 76.2673),
+    ('cochin', 'Ernakulam', 'Kerala', '', 9.9312, 76.2673),
+    ('kakkanad', 'Ernakulam', 'Kerala', '', 10.0159, 76.3419),
+    ('aluva', 'Ernakulam', 'Kerala', '683', 10.1004, 76.357),
+    ('thrissur', 'Thrissur', 'Kerala', '680', 10.5276, 76.2144),
+    ('trichur', 'Thrissur', 'Kerala', '', 10.5276, 76.2144),
+    ('palakkad', 'Palakkad', 'Kerala', '678', 10.7867, 76.6548),
+    ('palghat', 'Palakkad', 'Kerala', '', 10.7867, 76.6548),
+    ('malappuram', 'Malappuram', 'Kerala', '676', 11.051, 76.0711),
+    ('kozhikode', 'Kozhikode', 'Kerala', '673', 11.2588, 75.7804),
+    ('calicut', 'Kozhikode', 'Kerala', '', 11.2588, 75.7804),
+    ('wayanad', 'Wayanad', 'Kerala', '', 11.6854, 76.132),
+    ('kalpetta', 'Wayanad', 'Kerala', '', 11.6085, 76.083),
+    ('kannur', 'Kannur', 'Kerala', '670', 11.8745, 75.3704),
+    ('cannanore', 'Kannur', 'Kerala', '', 11.8745, 75.3704),
+    ('kasaragod', 'Kasaragod', 'Kerala', '671', 12.4996, 74.9869),
+    ('bengaluru', 'Bengaluru Urban', 'Karnataka', '560', 12.9716, 77.5946),
+    ('bangalore', 'Bengaluru Urban', 'Karnataka', '', 12.9716, 77.5946),
+    ('mysuru', 'Mysuru', 'Karnataka', '570', 12.2958, 76.6394),
+    ('mysore', 'Mysuru', 'Karnataka', '', 12.2958, 76.6394),
+    ('mangaluru', 'Dakshina Kannada', 'Karnataka', '575', 12.9141, 74.856),
+    ('mangalore', 'Dakshina Kannada', 'Karnataka', '', 12.9141, 74.856),
+    ('chennai', 'Chennai', 'Tamil Nadu', '600', 13.0827, 80.2707),
+    ('madras', 'Chennai', 'Tamil Nadu', '', 13.0827, 80.2707),
+    ('coimbatore', 'Coimbatore', 'Tamil Nadu', '641', 11.0168, 76.9558),
+    ('madurai', 'Madurai', 'Tamil Nadu', '625', 9.9252, 78.1198),
+    ('tiruchirappalli', 'Tiruchirappalli', 'Tamil Nadu', '620', 10.7905, 78.7047),
+    ('trichy', 'Tiruchirappalli', 'Tamil Nadu', '', 10.7905, 78.7047),
+    ('salem', 'Salem', 'Tamil Nadu', '636', 11.6643, 78.146),
+    ('tirunelveli', 'Tirunelveli', 'Tamil Nadu', '627', 8.7139, 77.7567),
+    ('nagercoil', 'Kanyakumari', 'Tamil Nadu', '629', 8.1833, 77.4119),
+    ('kanyakumari', 'Kanyakumari', 'Tamil Nadu', '', 8.0883, 77.5385),
+    ('hyderabad', 'Hyderabad', 'Telangana', '500', 17.385, 78.4867),
+    ('visakhapatnam', 'Visakhapatnam', 'Andhra Pradesh', '530', 17.6868, 83.2185),
+    ('vizag', 'Visakhapatnam', 'Andhra Pradesh', '', 17.6868, 83.2185),
+    ('mumbai', 'Mumbai', 'Maharashtra', '400', 19.076, 72.8777),
+    ('bombay', 'Mumbai', 'Maharashtra', '', 19.076, 72.8777),
+    ('thane', 'Thane', 'Maharashtra', '', 19.2183, 72.9781),
+    ('pune', 'Pune', 'Maharashtra', '411', 18.5204, 73.8567),
+    ('nashik', 'Nashik', 'Maharashtra', '422', 19.9975, 73.7898),
+    ('nagpur', 'Nagpur', 'Maharashtra', '440', 21.1458, 79.0882),
+    ('ahmedabad', 'Ahmedabad', 'Gujarat', '380', 23.0225, 72.5714),
+    ('surat', 'Surat', 'Gujarat', '395', 21.1702, 72.8311),
+    ('vadodara', 'Vadodara', 'Gujarat', '390', 22.3072, 73.1812),
+    ('delhi', 'New Delhi', 'Delhi', '110', 28.6139, 77.209),
+    ('new delhi', 'New Delhi', 'Delhi', '', 28.6139, 77.209),
+    ('noida', 'Gautam Buddh Nagar', 'Uttar Pradesh', '201', 28.5355, 77.391),
+    ('gurugram', 'Gurugram', 'Haryana', '122', 28.4595, 77.0266),
+    ('gurgaon', 'Gurugram', 'Haryana', '', 28.4595, 77.0266),
+    ('chandigarh', 'Chandigarh', 'Chandigarh', '160', 30.7333, 76.7794),
+    ('jaipur', 'Jaipur', 'Rajasthan', '302', 26.9124, 75.7873),
+    ('lucknow', 'Lucknow', 'Uttar Pradesh', '226', 26.8467, 80.9462),
+    ('kanpur', 'Kanpur Nagar', 'Uttar Pradesh', '208', 26.4499, 80.3319),
+    ('bhopal', 'Bhopal', 'Madhya Pradesh', '462', 23.2599, 77.4126),
+    ('indore', 'Indore', 'Madhya Pradesh', '452', 22.7196, 75.8577),
+    ('kolkata', 'Kolkata', 'West Bengal', '700', 22.5726, 88.3639),
+    ('calcutta', 'Kolkata', 'West Bengal', '', 22.5726, 88.3639),
+    ('patna', 'Patna', 'Bihar', '800', 25.5941, 85.1376),
+    ('bhubaneswar', 'Khordha', 'Odisha', '751', 20.2961, 85.8245),
+    ('guwahati', 'Kamrup Metropolitan', 'Assam', '781', 26.1445, 91.7362),
+]
+
+
+def load_centroids(apps, schema_editor):
+    Centroid = apps.get_model('user', 'Centroid')
+    Centroid.objects.bulk_create([
+        Centroid(name=name, district=district, state=state, pincode=pincode, latitude=latitude, longitude=longitude)
+        for name, district, state, pincode, latitude, longitude in CENTROIDS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0011_skill_jobskill'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Centroid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100)),
+                ('district', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+                ('pincode', models.CharField(blank=True, db_index=True, max_length=6)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='applicant',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='applicant',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['latitude', 'longitude'], name='job_geo_idx'),
+        ),
+        migrations.RunPython(load_centroids, migrations.RunPython.noop),
+    ]
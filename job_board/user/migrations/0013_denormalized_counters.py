@@ -0,0 +1,67 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:58
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model, group_by, **filters):
+    counts = (
+        model.objects.filter(**{group_by: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(group_by)
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    Company = apps.get_model('user', 'Company')
+    Job = apps.get_model('user', 'Job')
+    Application = apps.get_model('user', 'Application')
+    Job.objects.update(
+        application_count=_count(Application, 'job'),
+        pending_application_count=_count(Application, 'job', status='pending'),
+    )
+    Company.objects.update(
+        job_count=_count(Job, 'company'),
+        application_count=_count(Application, 'job__company'),
+        pending_application_count=_count(Application, 'job__company', status='pending'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0012_centroid_geocoding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='application_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='job_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='pending_application_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='application_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='pending_application_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:09
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0015_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('application_id', models.IntegerField()),
+                ('company_id', models.IntegerField()),
+                ('job_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['updated_at', 'id'], name='application_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationtombstone',
+            index=models.Index(fields=['company_id', 'deleted_at', 'id'], name='tombstone_company_idx'),
+        ),
+    ]
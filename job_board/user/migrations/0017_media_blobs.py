@@ -0,0 +1,53 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:19
+
+import user.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0016_application_changes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='applicant',
+            name='cv',
+            field=models.FileField(blank=True, null=True, storage=user.storage.media_storage, upload_to='resumes/'),
+        ),
+        migrations.AlterField(
+            model_name='applicant',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=user.storage.media_storage, upload_to='media/'),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='resume',
+            field=models.ImageField(storage=user.storage.media_storage, upload_to='resumes/'),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=user.storage.media_storage, upload_to='companies/'),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=user.storage.media_storage, upload_to='jobs/'),
+        ),
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['refcount', 'updated_at'], name='mediablob_unreferenced_idx')],
+            },
+        ),
+    ]
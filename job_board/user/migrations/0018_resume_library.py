@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:23
+
+import django.db.models.deletion
+import user.storage
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_resumes(apps, schema_editor):
+    """Each candidate's current CV becomes the first version in their library."""
+    Applicant = apps.get_model('user', 'Applicant')
+    Resume = apps.get_model('user', 'Resume')
+    MediaBlob = apps.get_model('user', 'MediaBlob')
+    for applicant_id, cv in Applicant.objects.exclude(cv='').exclude(cv=None).values_list('id', 'cv').iterator():
+        Resume.objects.create(applicant_id=applicant_id, file=cv, name=cv.rsplit('/', 1)[-1][:255])
+        MediaBlob.objects.filter(name=cv).update(refcount=F('refcount') + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0017_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='application',
+            name='resume',
+            field=models.FileField(storage=user.storage.media_storage, upload_to='resumes/'),
+        ),
+        migrations.CreateModel(
+            name='Resume',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(storage=user.storage.media_storage, upload_to='resumes/')),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('applicant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumes', to='user.applicant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['applicant', 'uploaded_at'], name='resume_applicant_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_resumes, migrations.RunPython.noop),
+    ]
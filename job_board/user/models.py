@@ -1,18 +1,20 @@
 from django.db import models
 from django.contrib.auth.models import User
+
+from .storage import media_storage
  
 class Applicant(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     email = models.CharField(max_length=50)
     phone = models.CharField(max_length=10, null=True,)
-    image = models.ImageField(upload_to="media/", null=True, blank=True)
+    image = models.ImageField(upload_to="media/", storage=media_storage, null=True, blank=True)
     gender = models.CharField(max_length=10)
     type = models.CharField(max_length=20)
     year = models.CharField(max_length=20)
     about = models.TextField(null=True, blank=True)
     work = models.TextField(null=True, blank=True)
     location = models.TextField(null=True, blank=True)
-    cv = models.FileField(upload_to="resumes/", null=True, blank=True)
+    cv = models.FileField(upload_to="resumes/", storage=media_storage, null=True, blank=True)
     district= models.TextField(null=True, blank=True)
     state= models.TextField(null=True, blank=True)
     country= models.TextField(null=True, blank=True)
@@ -25,40 +27,85 @@ class Applicant(models.Model):
     ]
 
     education_level = models.CharField(max_length=20, choices=EDUCATION_CHOICES, default='graduate')
+    # Geocoded from pincode/district/location by user.geo
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # media_file: who references a requested file
+            models.Index(fields=['image'], name='applicant_image_idx'),
+            models.Index(fields=['cv'], name='applicant_cv_idx'),
+        ]
  
     def __str__(self):
         return self.user.first_name
  
-class Company(models.Model):
+class CountersMixin:
+    """
+    Leave the counter columns out of ordinary saves so that a stale
+    in-memory copy (a form, the admin) can't overwrite increments made
+    by user.counters since it was loaded.
+    """
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class Company(CountersMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     phone = models.CharField(max_length=10)
-    image = models.ImageField(upload_to="companies/", null=True, blank=True)   
+    image = models.ImageField(upload_to="companies/", storage=media_storage, null=True, blank=True)   
     type = models.CharField(max_length=15)
     status = models.CharField(max_length=20)
     description = models.TextField(null=True, blank=True)
     company_name = models.CharField(max_length=100)
     website = models.TextField(null=True, blank=True)
+    # Maintained by user.counters; repair with reconcile_counters
+    job_count = models.PositiveIntegerField(default=0)
+    application_count = models.PositiveIntegerField(default=0)
+    pending_application_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    COUNTER_FIELDS = ('job_count', 'application_count', 'pending_application_count')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['image'], name='company_image_idx'),
+        ]
  
     def __str__ (self):
         return self.user.username
     
     def vacancy_count(self):
-        return self.job_set.count() 
+        return self.job_count
  
-class Job(models.Model):
+class Job(CountersMixin, models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
     start_date = models.DateField()
     end_date = models.DateField()
     title = models.CharField(max_length=200)
     salary = models.FloatField()
-    image = models.ImageField(upload_to="jobs/", null=True, blank=True)
+    image = models.ImageField(upload_to="jobs/", storage=media_storage, null=True, blank=True)
     description = models.TextField(max_length=400)
     experience = models.CharField(max_length=100)
     location = models.CharField(max_length=100)
     skills = models.CharField(max_length=200)
     creation_date = models.DateField() 
     featured = models.BooleanField(default=False)  
+    # Maintained by user.counters; repair with reconcile_counters
+    application_count = models.PositiveIntegerField(default=0)
+    pending_application_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    COUNTER_FIELDS = ('application_count', 'pending_application_count')
  
     FULL_TIME = 'full'
     PART_TIME = 'part'
@@ -81,21 +128,149 @@ class Job(models.Model):
     title = models.CharField(max_length=255)
     job_type = models.CharField(max_length=10, choices=JOB_TYPE_CHOICES, default=FULL_TIME)
     work_location = models.CharField(max_length=10, choices=WORK_LOCATION_CHOICES, default=OFFICE)
-  
+    # Geocoded from location by user.geo
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # bounding box pre-filter for radius searches
+            models.Index(fields=['latitude', 'longitude'], name='job_geo_idx'),
+            # job_listing sorts (keyset pagination seeks on field + id) and the home feed
+            models.Index(fields=['creation_date', 'id'], name='job_created_idx'),
+            models.Index(fields=['salary', 'id'], name='job_salary_idx'),
+            models.Index(fields=['title', 'id'], name='job_title_idx'),
+            # job_listing filters; also covers the facet GROUP BY
+            models.Index(fields=['job_type', 'experience', 'creation_date'], name='job_facet_idx'),
+            models.Index(fields=['experience', 'creation_date'], name='job_experience_idx'),
+            models.Index(fields=['image'], name='job_image_idx'),
+        ]
  
     def __str__ (self):
         return self.title
  
+class Centroid(models.Model):
+    # Lower-case place name (city, district or common alias) used for lookups
+    name = models.CharField(max_length=100, db_index=True)
+    district = models.CharField(max_length=100)
+    state = models.CharField(max_length=100)
+    # Full 6-digit pincode or 3-digit sorting district prefix; blank for aliases
+    pincode = models.CharField(max_length=6, blank=True, db_index=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    def __str__(self):
+        return f"{self.name} ({self.district}, {self.state})"
+
+
+class Skill(models.Model):
+    # Canonical, lower-case name as produced by user.skills.canonical_skill
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class JobSkill(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='job_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='job_skills')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'skill'], name='unique_job_skill'),
+        ]
+        indexes = [
+            # skill -> jobs lookups for any-of / all-of matching
+            models.Index(fields=['skill', 'job'], name='jobskill_skill_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job} - {self.skill}"
+
+ 
+class Resume(models.Model):
+    """One version of a candidate's CV (user.resumes)."""
+    applicant = models.ForeignKey(Applicant, on_delete=models.CASCADE, related_name='resumes')
+    file = models.FileField(upload_to="resumes/", storage=media_storage)
+    # The uploaded file's own name; the stored one is a content hash
+    name = models.CharField(max_length=255)
+    size = models.PositiveIntegerField(default=0)
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['applicant', 'uploaded_at'], name='resume_applicant_idx'),
+            models.Index(fields=['file'], name='resume_file_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ResumeText(models.Model):
+    """Text extracted from one stored CV file (user.resume_text)."""
+    PENDING, DONE, FAILED, UNSUPPORTED = 'pending', 'done', 'failed', 'unsupported'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+        (UNSUPPORTED, 'Unsupported'),
+    ]
+
+    # Storage name; content-addressed, so one row per distinct file
+    file = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=PENDING)
+    text = models.TextField(blank=True)
+    # Canonical skill names (user.skills), comma separated
+    skills = models.TextField(blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    extracted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.file
+
+
 class Application(models.Model):
     company = models.CharField(max_length=200, default="")
     job = models.ForeignKey(Job, on_delete=models.CASCADE)
     applicant = models.ForeignKey(Applicant, on_delete=models.CASCADE)
-    resume = models.ImageField(upload_to="resumes/")
+    # The chosen Resume version's file, shared rather than copied
+    resume = models.FileField(upload_to="resumes/", storage=media_storage)
     apply_date = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], default='pending')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Delta exports walk (updated_at, id) forward from a watermark
+            models.Index(fields=['updated_at', 'id'], name='application_updated_idx'),
+            # all_applicants: a company's applications, optionally by status
+            models.Index(fields=['company', 'status'], name='application_company_idx'),
+            # applied_jobs: a candidate's applications, newest first
+            models.Index(fields=['applicant', 'apply_date'], name='application_applicant_idx'),
+            # media_file: which applications a requested CV was sent with
+            models.Index(fields=['resume'], name='application_resume_idx'),
+        ]
  
     def __str__ (self):
         return str(self.applicant)
+
+
+class ApplicationTombstone(models.Model):
+    """A deleted Application, kept so delta exports can report the deletion."""
+    application_id = models.IntegerField()
+    # Plain ids rather than foreign keys: the tombstone has to outlive them
+    company_id = models.IntegerField()
+    job_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company_id', 'deleted_at', 'id'], name='tombstone_company_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted application {self.application_id}"
     
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -103,5 +278,82 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_idx'),
+            # user_homepage / notification only ever list unread rows
+            models.Index(
+                fields=['user', 'created_at'],
+                name='notification_unread_idx',
+                condition=models.Q(is_read=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Notification for {self.user.username}"
+
+class ExportJob(models.Model):
+    CSV = 'csv'
+    XLSX = 'xlsx'
+    PARQUET = 'parquet'
+    FORMAT_CHOICES = [
+        (CSV, 'CSV'),
+        (XLSX, 'Excel (XLSX)'),
+        (PARQUET, 'Parquet'),
+    ]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Ready'),
+        (FAILED, 'Failed'),
+    ]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='exports')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default=CSV)
+    # job / status / date_from / date_to, as accepted by user.exports.filter_applications
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="exports/", null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'created_at'], name='exportjob_company_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_format_display()} export for {self.company}"
+
+    @property
+    def percent(self):
+        if self.status == self.DONE:
+            return 100
+        return int(100 * self.processed_rows / self.total_rows) if self.total_rows else 0
+
+
+class MediaBlob(models.Model):
+    """A file in content-addressed media storage (user.storage)."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    # Model fields pointing at this blob; dedupe_media --prune deletes it
+    # once this has been 0 for a while
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['refcount', 'updated_at'], name='mediablob_unreferenced_idx'),
+        ]
+
     def __str__(self):
-        return f"Notification for {self.user.username}"
\ No newline at end of file
+        return self.name
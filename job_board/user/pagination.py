@@ -0,0 +1,137 @@
+"""Keyset (cursor) pagination.
+
+Pages are addressed by the sort value and id of the row on the edge of the
+previous page instead of an OFFSET, so every page costs the same as the
+first one and no ``COUNT(*)`` is needed. Cursors are signed so they stay
+opaque to clients and cannot be tampered with.
+"""
+from django.core import signing
+from django.db import OperationalError, connection
+from django.db.models import Q
+
+CURSOR_SALT = 'user.pagination.cursor'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` ordered by ``ordering`` (e.g. ``'-salary'``) with
+    ``id`` as the tie-breaker. Both keys always sort in the same direction,
+    so a single (field, id) index serves every page.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.model_field = queryset.model._meta.get_field(self.field)
+
+    def _encode(self, obj, direction):
+        value = self.model_field.value_to_string(obj)
+        return signing.dumps([self.field, value, obj.pk, direction], salt=CURSOR_SALT, compress=True)
+
+    def _decode(self, cursor):
+        try:
+            field, value, pk, direction = signing.loads(cursor, salt=CURSOR_SALT)
+        except (signing.BadSignature, ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        if field != self.field or direction not in ('next', 'prev'):
+            # Cursor was issued for a different sort; start over.
+            raise InvalidCursor(cursor)
+        return self.model_field.to_python(value), pk, direction
+
+    def _seek(self, value, pk, forward):
+        # "after" in display order means smaller keys for a descending sort
+        smaller = self.descending == forward
+        op = 'lt' if smaller else 'gt'
+        return Q(**{f'{self.field}__{op}': value}) | Q(**{self.field: value, f'pk__{op}': pk})
+
+    def _order(self, forward):
+        prefix = '-' if self.descending == forward else ''
+        return [f'{prefix}{self.field}', f'{prefix}pk']
+
+    def get_page(self, cursor=None, with_count=False):
+        forward = True
+        queryset = self.queryset
+        if cursor:
+            try:
+                value, pk, direction = self._decode(cursor)
+            except InvalidCursor:
+                cursor = None
+            else:
+                forward = direction == 'next'
+                queryset = queryset.filter(self._seek(value, pk, forward))
+
+        rows = list(queryset.order_by(*self._order(forward))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if forward:
+                if has_more:
+                    next_cursor = self._encode(rows[-1], 'next')
+                if cursor:
+                    previous_cursor = self._encode(rows[0], 'prev')
+            else:
+                next_cursor = self._encode(rows[-1], 'next')
+                if has_more:
+                    previous_cursor = self._encode(rows[0], 'prev')
+
+        count = self.queryset.count() if with_count else estimated_count(self.queryset)
+        return KeysetPage(rows, next_cursor, previous_cursor, count)
+
+
+def estimated_count(queryset):
+    """
+    Row count from planner statistics for an unfiltered queryset, or None.
+    Filtered querysets have no cheap estimate; callers should omit the total.
+    """
+    if queryset.query.where:
+        return None
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        elif connection.vendor == 'sqlite':
+            try:
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            except OperationalError:
+                # sqlite_stat1 only exists once ANALYZE has run
+                return None
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
@@ -0,0 +1,53 @@
+"""Per-view query budgets.
+
+Each view declares the most queries one request to it may run::
+
+    @query_budget(6)
+    def job_listing(request):
+        ...
+
+The number must not depend on how many rows the page shows; the tests in
+``user.tests`` render every URL against a small and a larger dataset and
+check both stay within budget. With ``DEBUG`` on, views also count their
+queries at runtime and log a warning when they go over.
+"""
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+BUDGETS = {}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def query_budget(max_queries):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not settings.DEBUG:
+                return view(request, *args, **kwargs)
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                response = view(request, *args, **kwargs)
+            if counter.count > max_queries:
+                logger.warning(
+                    "%s ran %d queries, over its budget of %d (%s)",
+                    view.__name__, counter.count, max_queries, request.get_full_path(),
+                )
+            return response
+
+        wrapper.query_budget = max_queries
+        BUDGETS[f'{view.__module__}.{view.__qualname__}'] = max_queries
+        return wrapper
+    return decorator
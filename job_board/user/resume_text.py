@@ -0,0 +1,292 @@
+"""Searchable text from candidates' CV files.
+
+Every stored CV (``Resume.file``, ``Application.resume``, ``Applicant.cv``)
+gets one ``ResumeText`` row keyed by its storage name. Content-addressed
+storage means one distinct file is extracted once, however many
+applications share it. The text is whitespace-normalized and capped at
+``MAX_TEXT_CHARS``. Skills found in it are canonicalized with
+``user.skills``. On SQLite both are mirrored into an FTS5 table
+(``user_resume_fts``) that answers recruiters' keyword searches, like the
+job index in ``user.search``.
+
+Extraction runs off the request path with local tools only:
+
+* PDF: pypdf when installed, otherwise a small built-in reader for the
+  text operators of uncompressed and Flate-compressed content streams
+* DOCX / ODT / RTF: the standard library
+* images: pytesseract plus the tesseract binary, when both are available
+
+New files are queued by the signals in ``user.signals`` as
+``tasks.extract_resume_text_task`` on the ``resumes`` queue. The broker
+caps that queue at ``RESUME_TEXT_QUEUE_MAX`` and rejects publishes beyond
+it rather than growing without bound. It is consumed by a prefork (process
+pool) worker::
+
+    celery -A job_board worker -Q resumes --pool prefork --concurrency 4 --prefetch-multiplier 1
+
+Files the queue dropped, and files from before this existed, are picked up
+by ``extract_resume_texts``. That command runs the extractors in a
+``ProcessPoolExecutor`` with a bounded number of files in flight.
+"""
+import html
+import importlib.util
+import io
+import logging
+import os
+import re
+import shutil
+import zipfile
+import zlib
+
+from django.db import connection
+from django.utils.timezone import now
+
+from .models import Applicant, Application, Resume, ResumeText, Skill
+from .skills import SKILL_ALIASES, canonical_skill
+from .storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'user_resume_fts'
+FTS_COLUMNS = ('text', 'skills')
+FTS_WEIGHTS = (1.0, 5.0)
+MAX_TEXT_CHARS = 20000
+MAX_RESULTS = 5000
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp', '.tif', '.tiff')
+SPACE_RE = re.compile(r'\s+')
+WORD_RE = re.compile(r'[\w+#.]+')
+# Skill names that are everyday words too; only counted as part of a longer phrase
+AMBIGUOUS_SKILLS = {'go', 'c', 'r', 'ai', 'ml', 'word', 'excel', 'swift'}
+
+
+class Unsupported(Exception):
+    pass
+
+
+# Built-in PDF reader: strings shown by Tj / ' / " and TJ arrays
+PDF_STREAM_RE = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.DOTALL)
+PDF_TEXT_RE = re.compile(rb'\((?:\\.|[^\\)])*\)\s*(?:Tj|\'|")|\[(?:\\.|[^\]\\])*\]\s*TJ|T\*|Td|TD|ET')
+PDF_STRING_RE = re.compile(rb'\(((?:\\.|[^\\)])*)\)|(-?\d+(?:\.\d+)?)')
+PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'', b'f': b'', b'(': b'(', b')': b')', b'\\': b'\\'}
+PDF_ESCAPE_RE = re.compile(rb'\\([0-7]{1,3}|.)', re.DOTALL)
+
+
+def _pdf_unescape(match):
+    code = match.group(1)
+    if code[:1].isdigit():
+        return bytes([int(code, 8) & 0xFF])
+    return PDF_ESCAPES.get(code, code)
+
+
+def _pdf_text_builtin(data):
+    parts = []
+    for stream in PDF_STREAM_RE.findall(data):
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        for operator in PDF_TEXT_RE.finditer(stream):
+            token = operator.group()
+            if not token.startswith((b'(', b'[')):
+                # Moving to a new line or text object
+                parts.append(b'\n')
+                continue
+            for string, kerning in PDF_STRING_RE.findall(token):
+                if string:
+                    parts.append(PDF_ESCAPE_RE.sub(_pdf_unescape, string))
+                elif kerning and float(kerning) < -200:
+                    # A wide gap inside a TJ array is a word space
+                    parts.append(b' ')
+    return b''.join(parts).decode('latin-1')
+
+
+def _pdf_text(data):
+    if importlib.util.find_spec('pypdf') is None:
+        return _pdf_text_builtin(data)
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def _xml_text(data, member, paragraph_tag):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        xml = archive.read(member).decode('utf-8')
+    xml = xml.replace(f'</{paragraph_tag}>', '\n')
+    return html.unescape(re.sub(r'<[^>]+>', ' ', xml))
+
+
+def _rtf_text(data):
+    text = data.decode('latin-1')
+    text = re.sub(r'\{\\\*[^{}]*\}', ' ', text)
+    text = re.sub(r"\\'([0-9a-f]{2})", lambda m: chr(int(m.group(1), 16)), text)
+    text = re.sub(r'\\par[d]?\b', '\n', text)
+    return re.sub(r'\\[a-z]+-?\d* ?|[{}]', ' ', text)
+
+
+def _image_text(data):
+    if importlib.util.find_spec('pytesseract') is None or shutil.which('tesseract') is None:
+        raise Unsupported("OCR needs pytesseract and the tesseract binary")
+    import pytesseract
+    from PIL import Image
+
+    return pytesseract.image_to_string(Image.open(io.BytesIO(data)))
+
+
+def extract_text(data, name):
+    """Plain text of a CV file's bytes; raises Unsupported for formats without a local extractor."""
+    extension = os.path.splitext(name)[1].lower()
+    if extension == '.pdf':
+        return _pdf_text(data)
+    if extension == '.docx':
+        return _xml_text(data, 'word/document.xml', 'w:p')
+    if extension == '.odt':
+        return _xml_text(data, 'content.xml', 'text:p')
+    if extension == '.rtf':
+        return _rtf_text(data)
+    if extension in IMAGE_EXTENSIONS:
+        return _image_text(data)
+    raise Unsupported(f"No text extractor for {extension or 'files without an extension'}")
+
+
+def read_and_extract(path, name):
+    """Process pool entry point: (status, text, error) for the file at ``path``."""
+    try:
+        with open(path, 'rb') as f:
+            text = extract_text(f.read(), name)
+    except Unsupported as e:
+        return ResumeText.UNSUPPORTED, '', str(e)
+    except Exception as e:
+        return ResumeText.FAILED, '', f'{type(e).__name__}: {e}'[:255]
+    return ResumeText.DONE, SPACE_RE.sub(' ', text).strip()[:MAX_TEXT_CHARS], ''
+
+
+def skill_vocabulary():
+    """Canonical skill names worth looking for: those jobs ask for, plus the aliased ones."""
+    return set(Skill.objects.values_list('name', flat=True)) | set(SKILL_ALIASES.values())
+
+
+def find_skills(text, vocabulary):
+    """Canonical names from ``vocabulary`` mentioned in ``text``, in order of first mention."""
+    words = [word.strip('.') for word in WORD_RE.findall(text.lower())]
+    found = []
+    for i in range(len(words)):
+        # Longest phrase first, so "machine learning" beats "machine"
+        for size in (3, 2, 1):
+            if i + size > len(words):
+                continue
+            name = canonical_skill(' '.join(words[i:i + size]))
+            if name in vocabulary and not (size == 1 and words[i] in AMBIGUOUS_SKILLS):
+                if name not in found:
+                    found.append(name)
+                break
+    return found
+
+
+def uses_fts(conn=None):
+    return (conn or connection).vendor == 'sqlite'
+
+
+def index_texts(rows):
+    """Mirror ResumeText rows into the FTS table."""
+    if not uses_fts() or not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row.pk,) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s)",
+            [(row.pk, row.text, row.skills) for row in rows],
+        )
+
+
+def unindex_texts(pks):
+    if not uses_fts() or not pks:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in pks])
+
+
+def rename_file(old, new):
+    """
+    Move the text extracted from storage name ``old`` to ``new``, the same
+    bytes under another name (``storage.replace_references``). When ``new``
+    has a row already, the extracted one of the two is kept.
+    """
+    rows = {row.file: row for row in ResumeText.objects.filter(file__in=[old, new])}
+    moving, existing = rows.get(old), rows.get(new)
+    if moving is None:
+        return
+    if existing is not None:
+        if existing.status == ResumeText.DONE or moving.status != ResumeText.DONE:
+            unindex_texts([moving.pk])
+            moving.delete()
+            return
+        unindex_texts([existing.pk])
+        existing.delete()
+    # The FTS rows are keyed by pk, so they stay as they are
+    ResumeText.objects.filter(pk=moving.pk).update(file=new)
+
+
+def save_result(name, status, text, error, vocabulary=None):
+    skills = find_skills(text, skill_vocabulary() if vocabulary is None else vocabulary)
+    row, _ = ResumeText.objects.update_or_create(file=name, defaults={
+        'status': status, 'text': text, 'skills': ', '.join(skills), 'error': error, 'extracted_at': now(),
+    })
+    index_texts([row])
+    return row
+
+
+def extract_file(name):
+    """Extract and index one stored file, unless that has been done already."""
+    if ResumeText.objects.filter(file=name).exclude(status=ResumeText.PENDING).exists():
+        return None
+    status, text, error = read_and_extract(media_storage().path(name), name)
+    if status != ResumeText.DONE:
+        logger.info("No text from %s: %s", name, error)
+    return save_result(name, status, text, error)
+
+
+def unextracted_files():
+    """Storage names of CVs in use that have no extracted text yet."""
+    names = set()
+    for queryset in (
+        Resume.objects.values_list('file', flat=True),
+        Application.objects.values_list('resume', flat=True),
+        Applicant.objects.exclude(cv=None).values_list('cv', flat=True),
+    ):
+        names.update(name for name in queryset.distinct() if name)
+    done = set(ResumeText.objects.exclude(status=ResumeText.PENDING).values_list('file', flat=True))
+    return sorted(names - done)
+
+
+def fts_match_expression(query):
+    # Every term must match, each as a prefix ("djang" finds "django")
+    tokens = re.findall(r'\w+', query or '')
+    return ' '.join('"%s"*' % token for token in tokens)
+
+
+def matching_files(query, limit=MAX_RESULTS):
+    """
+    A queryset of the storage names of CVs matching ``query``, for use in
+    ``resume__in=``. The index answers on SQLite; other backends fall back
+    to ``icontains`` on the stored text.
+    """
+    texts = ResumeText.objects.filter(status=ResumeText.DONE)
+    if uses_fts():
+        match = fts_match_expression(query)
+        if not match:
+            return texts.none().values('file')
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+                [match, limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        return texts.filter(pk__in=ids).values('file')
+
+    for token in re.findall(r'\w+', query or ''):
+        texts = texts.filter(text__icontains=token)
+    return texts.values('file')
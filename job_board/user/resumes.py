@@ -0,0 +1,97 @@
+"""A versioned CV library per candidate.
+
+Every CV a candidate uploads, from their profile or while applying, is
+kept as a ``Resume`` version. Applications point at the chosen version's
+file and don't store their own copy. Content-addressed storage
+(``user.storage``) makes that a reference, not a copy. One-click apply uses
+the newest version and needs no upload at all.
+
+Upload requests install ``ResumeUploadHandler`` before the body is read. It
+streams file parts straight to a temporary file on disk, never to memory,
+and skips a file once it grows past ``RESUME_MAX_BYTES``. The skipped file
+doesn't reach ``request.FILES`` and ``rejected_uploads`` says why.
+``validate_resume`` then checks the type from the file's leading bytes,
+since the client's content type can't be trusted.
+"""
+import os
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from .models import Resume
+
+# extension: leading bytes files of that type start with
+RESUME_TYPES = {
+    '.pdf': (b'%PDF-',),
+    '.doc': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    '.docx': (b'PK\x03\x04',),
+    '.odt': (b'PK\x03\x04',),
+    '.rtf': (b'{\\rtf',),
+}
+RESUME_FIELDS = ('resume', 'cv')
+
+
+class ResumeUploadHandler(TemporaryFileUploadHandler):
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+        self.limited = field_name in RESUME_FIELDS
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.limited and self.received > settings.RESUME_MAX_BYTES:
+            self.file.close()
+            rejected_uploads(self.request)[self.field_name] = (
+                f"Your CV is larger than {filesizeformat(settings.RESUME_MAX_BYTES)}."
+            )
+            raise SkipFile
+        return super().receive_data_chunk(raw_data, start)
+
+
+def rejected_uploads(request):
+    """``{field name: reason}`` for files ResumeUploadHandler skipped."""
+    if not hasattr(request, '_rejected_uploads'):
+        request._rejected_uploads = {}
+    return request._rejected_uploads
+
+
+def limit_resume_uploads(view):
+    """
+    Read the request body with ResumeUploadHandler. The handler has to be
+    installed before CSRF checking reads POST, hence exempt-then-protect.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [ResumeUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+    return wrapper
+
+
+def validate_resume(upload):
+    """An error message for an unacceptable CV, or None."""
+    extension = os.path.splitext(upload.name)[1].lower()
+    if extension not in RESUME_TYPES:
+        allowed = ', '.join(sorted(ext.lstrip('.').upper() for ext in RESUME_TYPES))
+        return f"Please upload your CV as one of: {allowed}."
+    if upload.size > settings.RESUME_MAX_BYTES:
+        return f"Your CV is larger than {filesizeformat(settings.RESUME_MAX_BYTES)}."
+    upload.seek(0)
+    head = upload.read(16)
+    upload.seek(0)
+    if not head.startswith(RESUME_TYPES[extension]):
+        return f"That file doesn't look like a {extension.lstrip('.').upper()} document."
+    return None
+
+
+def add_version(applicant, upload):
+    return Resume.objects.create(applicant=applicant, file=upload, name=upload.name[:255], size=upload.size)
+
+
+def latest(applicant):
+    return applicant.resumes.order_by('-uploaded_at', '-id').first()
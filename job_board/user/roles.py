@@ -0,0 +1,89 @@
+"""Who the current user is: an applicant, a company or neither.
+
+``UserRoleMiddleware`` puts a lazy ``request.user_role`` on every request.
+The role name is kept in the session from login onwards, so telling the two
+kinds of account apart costs no queries; the Applicant or Company row itself
+is only fetched (once, with its user) when a view asks for ``profile``.
+"""
+from django.utils.functional import SimpleLazyObject, cached_property
+
+from .models import Applicant, Company
+
+ROLE_SESSION_KEY = '_user_role'
+APPLICANT = 'applicant'
+COMPANY = 'company'
+
+PROFILE_MODELS = {
+    APPLICANT: Applicant,
+    COMPANY: Company,
+}
+
+
+class UserRole:
+    def __init__(self, user, name, profile=None):
+        self.user = user
+        self.name = name
+        if profile is not None:
+            self.__dict__['profile'] = profile
+
+    @property
+    def is_applicant(self):
+        return self.name == APPLICANT
+
+    @property
+    def is_company(self):
+        return self.name == COMPANY
+
+    @cached_property
+    def profile(self):
+        """The user's Applicant or Company, or None."""
+        model = PROFILE_MODELS.get(self.name)
+        if model is None:
+            return None
+        return model.objects.select_related('user').filter(user=self.user).first()
+
+    @property
+    def applicant(self):
+        return self.profile if self.is_applicant else None
+
+    @property
+    def company(self):
+        return self.profile if self.is_company else None
+
+
+def remember_role(request, role):
+    request.session[ROLE_SESSION_KEY] = role.name or ''
+    request.user_role = role
+
+
+def lookup_role(user):
+    """Find the user's role by querying for their Applicant, then Company."""
+    for name, model in PROFILE_MODELS.items():
+        profile = model.objects.select_related('user').filter(user=user).first()
+        if profile is not None:
+            return UserRole(user, name, profile)
+    return UserRole(user, None)
+
+
+def resolve_role(request):
+    user = request.user
+    if not user.is_authenticated:
+        return UserRole(user, None)
+
+    name = request.session.get(ROLE_SESSION_KEY)
+    if name is not None:
+        return UserRole(user, name or None)
+
+    # Sessions from before the role was cached: look it up once
+    role = lookup_role(user)
+    request.session[ROLE_SESSION_KEY] = role.name or ''
+    return role
+
+
+class UserRoleMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_role = SimpleLazyObject(lambda: resolve_role(request))
+        return self.get_response(request)
@@ -0,0 +1,175 @@
+"""Full-text search over jobs.
+
+On SQLite the index is an FTS5 virtual table (``user_job_fts``) keyed by the
+job id and kept in sync by the signals in ``user/signals.py``. On PostgreSQL
+the same columns are ranked with a weighted tsvector. Any other backend falls
+back to ``icontains`` lookups.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+
+from .models import Job
+
+FTS_TABLE = 'user_job_fts'
+
+# Most matches a single query may return; keeps ranking and the id__in
+# filter cheap for very broad queries.
+MAX_RESULTS = 1000
+
+# bm25 weights, in the order the columns are declared below.
+FTS_COLUMNS = ('title', 'description', 'skills', 'location', 'company_name')
+FTS_WEIGHTS = (10.0, 1.0, 5.0, 3.0, 6.0)
+
+CREATE_FTS_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    + ", ".join(FTS_COLUMNS)
+    + ", tokenize = 'unicode61 remove_diacritics 2')"
+)
+DROP_FTS_SQL = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def uses_fts(conn=None):
+    return (conn or connection).vendor == 'sqlite'
+
+
+def fts_match_expression(query):
+    # Every term must match; the last one is treated as a prefix so
+    # "pyth" finds "python" while the user is still typing.
+    tokens = TOKEN_RE.findall(query or '')
+    if not tokens:
+        return ''
+    terms = ['"%s"' % token for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _job_row(job):
+    return (
+        job.id,
+        job.title or '',
+        job.description or '',
+        job.skills or '',
+        job.location or '',
+        job.company.company_name or '',
+    )
+
+
+def index_jobs(jobs, conn=None):
+    conn = conn or connection
+    if not uses_fts(conn):
+        return
+    rows = [_job_row(job) for job in jobs]
+    if not rows:
+        return
+    with conn.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def index_job(job):
+    index_jobs([job])
+
+
+def unindex_job(job_id):
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [job_id])
+
+
+def rebuild_index(batch_size=2000, conn=None):
+    """Drop and repopulate the FTS table. Returns the number of jobs indexed."""
+    conn = conn or connection
+    if not uses_fts(conn):
+        return 0
+    with conn.cursor() as cursor:
+        cursor.execute(DROP_FTS_SQL)
+        cursor.execute(CREATE_FTS_SQL)
+
+    total = 0
+    batch = []
+    for job in Job.objects.select_related('company').order_by('id').iterator(chunk_size=batch_size):
+        batch.append(job)
+        if len(batch) >= batch_size:
+            index_jobs(batch, conn)
+            total += len(batch)
+            batch = []
+    index_jobs(batch, conn)
+    total += len(batch)
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def matching_job_ids(query, limit=MAX_RESULTS):
+    """Ids of jobs matching ``query``, best match first (SQLite only)."""
+    match = fts_match_expression(query)
+    if not match:
+        return []
+    weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+            [match, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def in_rank_order(jobs, ids):
+    """Narrow ``jobs`` to ``ids``, keeping the order of ``ids``."""
+    if not ids:
+        return jobs.none()
+    ranking = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return jobs.filter(pk__in=ids).order_by(ranking)
+
+
+def search_jobs(query, queryset=None):
+    """
+    Return ``queryset`` (all jobs by default) narrowed to ``query`` and
+    ordered by relevance. Callers may re-order the result.
+    """
+    jobs = Job.objects.all() if queryset is None else queryset
+    if not query or not query.strip():
+        return jobs
+
+    if uses_fts():
+        return in_rank_order(jobs, matching_job_ids(query))
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = (
+            SearchVector('title', weight='A')
+            + SearchVector('skills', weight='B')
+            + SearchVector('company__company_name', weight='B')
+            + SearchVector('location', weight='C')
+            + SearchVector('description', weight='D')
+        )
+        search_query = SearchQuery(query, search_type='websearch')
+        return (
+            jobs.annotate(rank=SearchRank(vector, search_query))
+            .filter(rank__gt=0)
+            .order_by('-rank')
+        )
+
+    q = Q()
+    for token in TOKEN_RE.findall(query):
+        q &= (
+            Q(title__icontains=token)
+            | Q(skills__icontains=token)
+            | Q(location__icontains=token)
+            | Q(company__company_name__icontains=token)
+        )
+    return jobs.filter(q).order_by('-creation_date')
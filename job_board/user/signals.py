@@ -0,0 +1,222 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, feed, fuzzy, geo, images, matching, search, skills, storage, unified_search
+from .models import Applicant, Application, ApplicationTombstone, Company, Job, Resume, ResumeText
+from .tasks import enqueue, extract_resume_text_task, make_image_derivatives_task
+
+
+@receiver(pre_save, sender=Job)
+def geocode_job(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'location' not in update_fields):
+        return
+    geo.geocode_job(instance)
+
+
+@receiver(pre_save, sender=Applicant)
+def geocode_applicant(sender, instance, raw=False, update_fields=None, **kwargs):
+    location_fields = {'pincode', 'location', 'district', 'state'}
+    if raw or (update_fields is not None and not location_fields & set(update_fields)):
+        return
+    geo.geocode_applicant(instance)
+
+
+@receiver(post_save, sender=Job)
+def index_saved_job(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_job(instance)
+    fuzzy.index_job(instance)
+    skills.sync_job_skills(instance)
+    vector = matching.encode_job(instance)
+    transaction.on_commit(lambda: matching.job_vectors.upsert([(instance.pk, vector)]))
+
+
+@receiver(post_delete, sender=Job)
+def unindex_deleted_job(sender, instance, **kwargs):
+    search.unindex_job(instance.pk)
+    fuzzy.unindex_job(instance.pk)
+    pk = instance.pk
+    transaction.on_commit(lambda: matching.job_vectors.delete([pk]))
+
+
+@receiver(post_save, sender=Company)
+def reindex_company_jobs(sender, instance, created=False, raw=False, **kwargs):
+    # company_name is part of every job row in the index
+    if raw or created:
+        return
+    search.index_jobs(instance.job_set.select_related('company'))
+    fuzzy.index_jobs(instance.job_set.all())
+
+
+@receiver(post_save, sender=Applicant)
+def update_applicant_vector(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    vector = matching.encode_applicant(instance)
+    transaction.on_commit(lambda: matching.applicant_vectors.upsert([(instance.pk, vector)]))
+
+
+@receiver(post_save, sender=Resume)
+@receiver(post_delete, sender=Resume)
+def update_vector_for_cv_version(sender, instance, raw=False, **kwargs):
+    # A new (or removed) latest version may carry different, already extracted skills
+    if raw:
+        return
+    pairs = [(applicant.id, matching.encode_applicant(applicant))
+             for applicant in matching.with_cv_skills(Applicant.objects.filter(pk=instance.applicant_id))]
+    transaction.on_commit(lambda: matching.applicant_vectors.upsert(pairs))
+
+
+@receiver(post_save, sender=ResumeText)
+def update_vectors_for_cv_text(sender, instance, raw=False, **kwargs):
+    # CV skills are part of the applicant's vector
+    if raw or instance.status != ResumeText.DONE:
+        return
+    pairs = matching.applicants_with_cv(instance.file)
+    transaction.on_commit(lambda: matching.applicant_vectors.upsert(pairs))
+
+
+@receiver(post_delete, sender=Applicant)
+def delete_applicant_vector(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: matching.applicant_vectors.delete([pk]))
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=Applicant)
+@receiver(post_delete, sender=Applicant)
+def invalidate_unified_search(sender, **kwargs):
+    unified_search.invalidate()
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def refresh_home_feed_for_job(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    pk, creation_date = instance.pk, instance.creation_date
+    transaction.on_commit(lambda: feed.job_changed(pk, creation_date))
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def refresh_home_feed_for_company(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: feed.company_changed(pk))
+
+
+@receiver(post_save, sender=Job)
+def count_added_job(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        counters.job_added(instance)
+
+
+@receiver(post_delete, sender=Job)
+def count_removed_job(sender, instance, **kwargs):
+    counters.job_removed(instance)
+
+
+@receiver(pre_save, sender=Application)
+def remember_application_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding or (update_fields is not None and 'status' not in update_fields):
+        return
+    instance._previous_status = (
+        Application.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Application)
+def count_saved_application(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.application_added(instance)
+        return
+    previous = instance.__dict__.pop('_previous_status', instance.status)
+    if previous != instance.status:
+        counters.status_changed(instance, previous)
+
+
+@receiver(post_delete, sender=Application)
+def count_removed_application(sender, instance, **kwargs):
+    counters.application_removed(instance)
+
+
+@receiver(post_delete, sender=Application)
+def record_deleted_application(sender, instance, **kwargs):
+    # Delta exports report deletions from these. Cascades delete
+    # applications before their job, so the job row is still there.
+    if Application.job.is_cached(instance):
+        company_id = instance.job.company_id
+    else:
+        company_id = Job.objects.filter(pk=instance.job_id).values_list('company_id', flat=True).first()
+    if company_id is not None:
+        ApplicationTombstone.objects.create(
+            application_id=instance.pk, company_id=company_id, job_id=instance.job_id,
+        )
+
+
+@receiver(post_save, sender=Applicant)
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Job)
+def queue_image_derivatives(sender, instance, raw=False, **kwargs):
+    # A new upload gets a new name, which has no derivatives yet;
+    # build_image_derivatives makes any that couldn't be queued
+    if raw or not instance.image or images.has_derivatives(instance.image.name):
+        return
+    name = instance.image.name
+    transaction.on_commit(lambda: enqueue(make_image_derivatives_task, name))
+
+
+@receiver(post_init, sender=Applicant)
+@receiver(post_init, sender=Company)
+@receiver(post_init, sender=Job)
+@receiver(post_init, sender=Application)
+@receiver(post_init, sender=Resume)
+def remember_media(sender, instance, **kwargs):
+    instance._stored_media = storage.stored_names(instance)
+
+
+@receiver(post_save, sender=Applicant)
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=Resume)
+def count_media_references(sender, instance, created=False, **kwargs):
+    previous = {} if created else getattr(instance, '_stored_media', {})
+    current = storage.stored_names(instance)
+    changed = [
+        field for field, name in current.items()
+        if created or (field in previous and previous[field] != name)
+    ]
+    storage.acquire(current[field] for field in changed)
+    storage.release(previous[field] for field in changed if field in previous)
+    instance._stored_media = current
+
+
+@receiver(post_delete, sender=Applicant)
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Application)
+@receiver(post_delete, sender=Resume)
+def release_media_references(sender, instance, **kwargs):
+    storage.release(storage.stored_names(instance).values())
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=Resume)
+def queue_resume_text(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not created:
+        return
+    name = (instance.resume if sender is Application else instance.file).name
+    if name:
+        # The task skips files whose text is already extracted;
+        # extract_resume_texts catches up on any that couldn't be queued
+        transaction.on_commit(lambda: enqueue(extract_resume_text_task, name))
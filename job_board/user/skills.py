@@ -0,0 +1,117 @@
+"""Normalized job skills.
+
+``Job.skills`` stays the free text the employer typed; ``parse_skills`` turns
+it into canonical skill names which are stored as ``Skill`` / ``JobSkill``
+rows whenever a job is saved. Skill filters are then indexed joins on
+``JobSkill`` instead of ``LIKE`` scans over the text.
+"""
+import re
+
+from django.db.models import Count
+
+from .models import Job, JobSkill, Skill
+
+SEPARATOR_RE = re.compile(r'[,;/|\n\r\t•]+|\s+(?:and|&)\s+', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+
+# Common spellings mapped onto one canonical name
+SKILL_ALIASES = {
+    'js': 'javascript',
+    'java script': 'javascript',
+    'ecmascript': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'python3': 'python',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'react js': 'react',
+    'node': 'node.js',
+    'nodejs': 'node.js',
+    'node js': 'node.js',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'angularjs': 'angular',
+    'angular.js': 'angular',
+    'golang': 'go',
+    'postgres': 'postgresql',
+    'psql': 'postgresql',
+    'mongo': 'mongodb',
+    'ms sql': 'sql server',
+    'mssql': 'sql server',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'c sharp': 'c#',
+    'csharp': 'c#',
+    'cpp': 'c++',
+    'html5': 'html',
+    'css3': 'css',
+    'ms excel': 'excel',
+    'microsoft excel': 'excel',
+    'ms word': 'word',
+    'microsoft word': 'word',
+    'drf': 'django rest framework',
+}
+
+MAX_SKILL_LENGTH = 100
+
+
+def canonical_skill(name):
+    # List bullets and trailing full stops go; a leading dot stays (".net")
+    name = SPACE_RE.sub(' ', name.lower()).lstrip('- ').rstrip('.- ')
+    return SKILL_ALIASES.get(name, name)[:MAX_SKILL_LENGTH]
+
+
+def parse_skills(text):
+    """Canonical skill names in ``text`` (comma/slash/"and" separated), in order, without duplicates."""
+    if isinstance(text, str):
+        text = SEPARATOR_RE.split(text)
+    seen = []
+    for part in text or ():
+        name = canonical_skill(part)
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+
+def get_or_create_skills(names):
+    existing = dict(Skill.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [Skill(name=name) for name in names if name not in existing]
+    if missing:
+        Skill.objects.bulk_create(missing, ignore_conflicts=True)
+        existing.update(Skill.objects.filter(name__in=[s.name for s in missing]).values_list('name', 'id'))
+    return existing
+
+
+def sync_job_skills(job):
+    """Make the job's JobSkill rows match its ``skills`` text."""
+    wanted = set(get_or_create_skills(parse_skills(job.skills)).values())
+    current = set(JobSkill.objects.filter(job=job).values_list('skill_id', flat=True))
+    if current - wanted:
+        JobSkill.objects.filter(job=job, skill_id__in=current - wanted).delete()
+    if wanted - current:
+        JobSkill.objects.bulk_create(
+            [JobSkill(job=job, skill_id=skill_id) for skill_id in wanted - current],
+            ignore_conflicts=True,
+        )
+
+
+def jobs_with_skills(names, match='any', queryset=None):
+    """
+    Narrow ``queryset`` (all jobs by default) to jobs requiring any (or, with
+    ``match='all'``, every one) of the skills in ``names``. Names are
+    canonicalized, so "ReactJS, node" finds jobs listing "React / Node.js".
+    """
+    jobs = Job.objects.all() if queryset is None else queryset
+    names = parse_skills(names)
+    if not names:
+        return jobs
+
+    matches = JobSkill.objects.filter(skill__name__in=names)
+    if match == 'all':
+        matches = (
+            matches.values('job')
+            .annotate(matched=Count('skill', distinct=True))
+            .filter(matched=len(names))
+        )
+    return jobs.filter(pk__in=matches.values('job'))
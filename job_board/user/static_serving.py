@@ -0,0 +1,88 @@
+"""Serve collected static files from the app, with long-lived caching.
+
+For deployments without a front-end server handling ``STATIC_URL`` (set
+``SERVE_STATIC``). Content-hashed names from ``collectstatic`` never
+change, so they go out as ``public, max-age=31536000, immutable`` and
+browsers stop revalidating them. Other names get a short max-age and
+answer conditional requests. A ``.br`` / ``.gz`` sibling written by
+``CompressedManifestStaticFilesStorage`` is sent instead of the original
+when the client accepts that encoding.
+
+Behind nginx the same is::
+
+    location /static/ {
+        alias /srv/job_board/assets/;
+        gzip_static on;
+        brotli_static on;
+        expires max;
+        add_header Cache-Control "public, immutable";
+    }
+"""
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 5 * 60
+
+# (Accept-Encoding token, file suffix), most preferred first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+
+def accepted_encodings(request):
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def is_hashed(path):
+    # ManifestStaticFilesStorage names: name.<12 hex digits>.ext
+    return HASHED_NAME_RE.search(path) is not None
+
+
+def serve(request, path):
+    path = posixpath.normpath(path).lstrip('/')
+    # Paths escaping STATIC_ROOT raise SuspiciousFileOperation (a 400)
+    fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    if not fullpath.is_file() or fullpath.suffix in ('.gz', '.br'):
+        raise Http404
+
+    immutable = is_hashed(path)
+    statobj = fullpath.stat()
+    if not immutable and not was_modified_since(request.headers.get('If-Modified-Since'), statobj.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type, _ = mimetypes.guess_type(path)
+    served, encoding = fullpath, None
+    accepted = accepted_encodings(request)
+    for coding, suffix in ENCODINGS:
+        variant = fullpath.with_name(fullpath.name + suffix)
+        if coding in accepted and variant.is_file():
+            served, encoding = variant, coding
+            break
+
+    response = FileResponse(
+        served.open('rb'), content_type=content_type or 'application/octet-stream', filename=fullpath.name,
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Last-Modified'] = http_date(statobj.st_mtime)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if immutable:
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=MUTABLE_MAX_AGE)
+    return response
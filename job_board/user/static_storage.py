@@ -0,0 +1,155 @@
+"""Fingerprinted, precompressed static files.
+
+``collectstatic`` with ``CompressedManifestStaticFilesStorage`` runs three
+steps on the files it collected into ``STATIC_ROOT``:
+
+1. With ``STATIC_SUBSET_FONTS`` on and fontTools installed, the icon fonts
+   listed in ``ICON_FONTS`` are cut down to the glyphs that templates
+   reference as ``mdi-*`` / ``fa-*`` classes. It is off by default: icons
+   whose class names are built at runtime would go missing.
+2. Every file gets a content hash in its name (``style.3f2a9c1e.css``), and
+   references inside CSS are rewritten to match, as
+   ``ManifestStaticFilesStorage`` does. References to files that don't
+   exist are left alone instead of failing the build.
+3. Text-like files get ``.gz`` and, with the brotli package, ``.br``
+   siblings compressed at the highest level, kept only when smaller.
+
+``user.static_serving.serve`` (or nginx with ``gzip_static`` /
+``brotli_static``) then sends the precompressed variant the client accepts
+and marks hashed names as immutable for a year.
+"""
+import gzip
+import importlib.util
+import logging
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.svg', '.json', '.map', '.txt', '.xml', '.html', '.ttf', '.otf', '.eot', '.ico'}
+MIN_COMPRESS_BYTES = 512
+# Keep a compressed variant only when it saves at least this fraction
+MIN_SAVING = 0.05
+
+# (stylesheet, class prefix, font files it uses), all relative to STATIC_ROOT
+ICON_FONTS = [
+    ('css/mdi/css/materialdesignicons.min.css', 'mdi', [
+        'css/mdi/fonts/materialdesignicons-webfont.woff2',
+        'css/mdi/fonts/materialdesignicons-webfont.woff',
+        'css/mdi/fonts/materialdesignicons-webfont.ttf',
+    ]),
+    ('css/font-awesome/css/font-awesome.min.css', 'fa', [
+        'css/font-awesome/fonts/fontawesome-webfont.woff2',
+        'css/font-awesome/fonts/fontawesome-webfont.woff',
+        'css/font-awesome/fonts/fontawesome-webfont.ttf',
+    ]),
+]
+ICON_RULE_RE = r'\.{prefix}-([a-z0-9-]+):{{1,2}}before\s*\{{\s*content:\s*["\']\\([0-9a-fA-F]+)["\']'
+
+
+def compress(path):
+    """Write ``path.gz`` (and ``path.br`` when brotli is installed); returns the variants written."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return []
+
+    variants = [('.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if importlib.util.find_spec('brotli') is not None:
+        import brotli
+
+        variants.append(('.br', lambda: brotli.compress(data, quality=11)))
+
+    written = []
+    for suffix, encode in variants:
+        encoded = encode()
+        if len(encoded) <= len(data) * (1 - MIN_SAVING):
+            with open(path + suffix, 'wb') as f:
+                f.write(encoded)
+            written.append(path + suffix)
+    return written
+
+
+def used_icon_classes(prefix, directories):
+    """Icon names (``home`` for ``mdi-home``) used in the templates under ``directories``."""
+    pattern = re.compile(r'\b%s-([a-z0-9-]+)' % re.escape(prefix))
+    names = set()
+    for directory in directories:
+        for path in Path(directory).rglob('*.html'):
+            names.update(pattern.findall(path.read_text(encoding='utf-8', errors='ignore')))
+    return names
+
+
+def subset_icon_font(css_path, prefix, font_paths, used):
+    """Cut the fonts down to the glyphs of the ``used`` icon classes; returns the glyph count kept."""
+    from fontTools import subset
+
+    with open(css_path, encoding='utf-8') as f:
+        rules = re.findall(ICON_RULE_RE.format(prefix=re.escape(prefix)), f.read())
+    codepoints = {int(code, 16) for name, code in rules if name in used}
+    if not codepoints:
+        return 0
+
+    options = subset.Options()
+    options.layout_features = ['*']
+    options.notdef_outline = True
+    for font_path in font_paths:
+        if not os.path.exists(font_path):
+            continue
+        flavor = {'.woff2': 'woff2', '.woff': 'woff'}.get(os.path.splitext(font_path)[1])
+        if flavor == 'woff2' and importlib.util.find_spec('brotli') is None:
+            # fontTools needs brotli to write WOFF2
+            continue
+        options.flavor = flavor
+        font = subset.load_font(font_path, options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font)
+        subset.save_font(font, font_path, options)
+    return len(codepoints)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def lenient(matchobj):
+            try:
+                return converter(matchobj)
+            except ValueError as e:
+                logger.warning("Leaving reference in %s as it is: %s", name, e)
+                return matchobj['matched']
+        return lenient
+
+    def subset_fonts(self):
+        template_dirs = [
+            directory for engine in settings.TEMPLATES for directory in engine.get('DIRS', [])
+        ] + [str(Path(settings.BASE_DIR) / 'user' / 'templates')]
+        for css_name, prefix, font_names in ICON_FONTS:
+            if not self.exists(css_name):
+                continue
+            kept = subset_icon_font(
+                self.path(css_name), prefix, [self.path(name) for name in font_names],
+                used_icon_classes(prefix, template_dirs),
+            )
+            yield css_name, kept
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        if getattr(settings, 'STATIC_SUBSET_FONTS', False) and importlib.util.find_spec('fontTools') is not None:
+            for css_name, kept in self.subset_fonts():
+                logger.info("Subset %s fonts to %d glyphs", css_name, kept)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        for hashed_name in set(self.hashed_files.values()):
+            if os.path.splitext(hashed_name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                for variant in compress(self.path(hashed_name)):
+                    yield os.path.relpath(variant, self.location), variant, True
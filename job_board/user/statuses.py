@@ -0,0 +1,89 @@
+"""Accepting and rejecting applications, one or many at a time.
+
+``change_statuses`` applies one status to a batch of a company's
+applications in a single transaction. It uses a fixed number of queries
+however many are selected: one SELECT, ``bulk_update`` for the rows,
+``bulk_create`` for the candidates' notifications, and one UPDATE each for
+the job and company counters.
+
+``bulk_update`` sends no signals and ignores ``auto_now``, so this module
+does the work ``user.signals`` would otherwise do for a saved
+Application. It adjusts the pending counters (``counters.statuses_changed``)
+and sets ``updated_at`` so delta exports pick the changes up.
+
+A selection larger than ``MAX_SELECTED`` is refused with
+``TooManySelected`` rather than cut short, so nobody is left believing
+the rest were changed too.
+"""
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import counters
+from .models import Application, Notification
+
+MAX_SELECTED = 1000
+BATCH_SIZE = 500
+STATUSES = dict(Application._meta.get_field('status').choices)
+NOTIFICATION_MESSAGES = {
+    'accepted': "Your application for {job} has been accepted.",
+    'rejected': "Your application for {job} has been rejected.",
+}
+
+
+class TooManySelected(ValueError):
+    pass
+
+
+def selected_ids(values):
+    """
+    Application ids from form values, ignoring anything that isn't one.
+    Raises ``TooManySelected`` for more than ``MAX_SELECTED`` values.
+    """
+    if len(values) > MAX_SELECTED:
+        raise TooManySelected(len(values))
+    ids = []
+    for value in values:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def change_statuses(company, application_ids, status):
+    """
+    Set ``status`` on the company's applications among ``application_ids``
+    and notify their candidates. Returns ``(changed, unchanged)`` lists of
+    ids. Ids that aren't the company's are in neither list.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"Unknown application status {status!r}")
+
+    with transaction.atomic():
+        applications = list(
+            Application.objects.select_for_update()
+            .filter(job__company=company, pk__in=application_ids)
+            .select_related('job', 'applicant')
+            .order_by('pk')
+        )
+        changed = [application for application in applications if application.status != status]
+        old_statuses = {application.pk: application.status for application in changed}
+        updated_at = now()
+        for application in changed:
+            application.status = status
+            application.updated_at = updated_at
+        if changed:
+            Application.objects.bulk_update(changed, ['status', 'updated_at'], batch_size=BATCH_SIZE)
+            counters.statuses_changed(changed, old_statuses)
+
+        message = NOTIFICATION_MESSAGES.get(status)
+        if message and changed:
+            Notification.objects.bulk_create([
+                Notification(user_id=application.applicant.user_id, message=message.format(job=application.job))
+                for application in changed
+            ], batch_size=BATCH_SIZE)
+
+    return (
+        [application.pk for application in changed],
+        [application.pk for application in applications if application.pk not in old_statuses],
+    )
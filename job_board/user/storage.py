@@ -0,0 +1,153 @@
+"""Content-addressed, deduplicating storage for uploaded media.
+
+Uploads to the file fields that use ``media_storage`` are hashed (SHA-256)
+while they are streamed to a temporary file, then stored as
+``blobs/<aa>/<bb>/<hash><ext>``. An upload whose bytes are already stored
+is dropped, and the field points at the existing blob, so each file is on
+disk once however often it is uploaded.
+
+Every blob has a ``MediaBlob`` row whose ``refcount`` is the number of
+model fields pointing at it. The signals in ``user.signals`` keep it up to
+date with ``acquire``/``release`` when rows are saved or deleted.
+Unreferenced blobs aren't removed straight away: a concurrent upload of the
+same bytes may be about to point at them. ``dedupe_media --prune`` deletes
+the ones that have been unreferenced for longer than
+``MEDIA_PRUNE_GRACE`` seconds. ``dedupe_media`` also moves files uploaded
+before this storage existed into it.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, storages
+from django.db.models import F, FileField
+from django.utils.timezone import now
+
+BLOB_DIR = 'blobs'
+
+
+def blob_name(digest, original_name):
+    extension = os.path.splitext(original_name)[1].lower()
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Names come from the content, so a clash means the same bytes
+        return name
+
+    def _save(self, name, content):
+        blobs = self.path(BLOB_DIR)
+        os.makedirs(blobs, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, temporary = tempfile.mkstemp(dir=blobs, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+
+            name = blob_name(digest.hexdigest(), name)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temporary)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(temporary, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+        MediaBlob = apps.get_model('user', 'MediaBlob')
+        _, created = MediaBlob.objects.get_or_create(name=name, defaults={'size': size})
+        if not created:
+            # Keeps prune() off a blob that is about to be referenced again
+            MediaBlob.objects.filter(name=name).update(updated_at=now())
+        return name
+
+
+def media_storage():
+    return storages['media']
+
+
+def media_fields():
+    """(model, field name) for every file field stored in content-addressed storage."""
+    return [
+        (model, field.name)
+        for model in apps.get_app_config('user').get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def stored_names(instance):
+    """``{attname: blob name}`` for ``instance``'s media fields, skipping deferred ones."""
+    return {
+        field.attname: str(instance.__dict__[field.attname] or '')
+        for field in instance._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+        and field.attname in instance.__dict__
+    }
+
+
+def _adjust(names, delta):
+    MediaBlob = apps.get_model('user', 'MediaBlob')
+    for name in names:
+        # Names from before this storage have no MediaBlob row and are left alone
+        if name and name.startswith(BLOB_DIR + '/'):
+            MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + delta, updated_at=now())
+
+
+def acquire(names):
+    _adjust(names, 1)
+
+
+def release(names):
+    _adjust(names, -1)
+
+
+def replace_references(old, new):
+    """
+    Point every media field holding ``old`` at ``new``, and the CV text
+    extracted from it; returns the number of rows changed.
+    """
+    from .resume_text import rename_file
+
+    moved = 0
+    for model, field in media_fields():
+        changes = {field: new}
+        if any(f.name == 'updated_at' for f in model._meta.concrete_fields):
+            # The page showing the file has changed (conditional GETs, delta exports)
+            changes['updated_at'] = now()
+        moved += model.objects.filter(**{field: old}).update(**changes)
+    if moved:
+        _adjust([new], moved)
+        _adjust([old], -moved)
+    rename_file(old, new)
+    return moved
+
+
+def prune(older_than):
+    """Delete blobs unreferenced since before ``older_than``; returns (blobs, bytes) freed."""
+    from .images import delete_derivatives
+
+    MediaBlob = apps.get_model('user', 'MediaBlob')
+    storage = media_storage()
+    blobs = freed = 0
+    for blob in MediaBlob.objects.filter(refcount__lte=0, updated_at__lt=older_than):
+        # Delete the row first, and only if nothing has touched it since
+        if MediaBlob.objects.filter(pk=blob.pk, refcount__lte=0, updated_at__lt=older_than).delete()[0]:
+            storage.delete(blob.name)
+            delete_derivatives(blob.name)
+            blobs += 1
+            freed += blob.size
+    return blobs, freed
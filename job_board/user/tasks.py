@@ -1,9 +1,29 @@
 from celery import shared_task
 from django.core.mail import send_mail
+from kombu.exceptions import KombuError
 import logging
 
+from .exports import run_export
+from .images import make_derivatives
+from .resume_text import extract_file
+
 logger = logging.getLogger(__name__)
 
+
+def enqueue(task, *args):
+    """
+    Publish ``task`` without letting a broker outage fail the request that
+    triggered it (the rows are already saved by then). Returns whether it
+    was queued; what wasn't is picked up by the task's backfill command.
+    """
+    try:
+        task.apply_async(args, retry=False)
+    except (KombuError, OSError) as e:
+        logger.warning("Couldn't queue %s%r: %s", task.name, args, e)
+        return False
+    return True
+
+
 @shared_task(bind=True)
 def send_contact_email_task(self, subject, message, from_email):
     try:
@@ -20,3 +40,18 @@ def send_contact_email_task(self, subject, message, from_email):
         raise self.retry(exc=e, countdown=60)  # Retry task in case of failure
 
 
+
+
+@shared_task
+def export_applications_task(export_id):
+    run_export(export_id)
+
+
+@shared_task
+def make_image_derivatives_task(name):
+    make_derivatives(name)
+
+
+@shared_task(ignore_result=True)
+def extract_resume_text_task(name):
+    extract_file(name)
@@ -0,0 +1,27 @@
+from django import template
+from django.utils.html import format_html
+
+from user.images import WIDTHS, derivative_urls
+
+register = template.Library()
+
+
+def _fitting(urls, pixels):
+    # The smallest derivative at least ``pixels`` wide, else the largest
+    return urls[next((width for width in WIDTHS if width >= pixels), WIDTHS[-1])]
+
+
+@register.simple_tag
+def srcset(image, width):
+    """
+    ``src`` and ``srcset`` attributes for an image shown ``width`` CSS pixels wide::
+
+        <img {% srcset company.image 85 %} alt="">
+
+    Falls back to the uploaded file until its derivatives exist.
+    """
+    urls = derivative_urls(image.name)
+    if urls is None:
+        return format_html('src="{}"', image.url)
+    one, two = _fitting(urls, width), _fitting(urls, width * 2)
+    return format_html('src="{}" srcset="{} 1x, {} 2x"', one, one, two)
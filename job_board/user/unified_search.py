@@ -0,0 +1,179 @@
+"""The site-wide search behind search_results.
+
+Each section (jobs, companies, candidates) returns at most ``limit`` rows
+plus a flag saying whether there are more, so a one-letter query costs the
+same as a specific one. The sections run concurrently on a small thread
+pool, each with its own DB connection, and a section that overruns
+``UNIFIED_SEARCH_TIMEOUT`` is reported as timed out instead of holding up
+the page. The overrunning query is stopped in the database too, not just
+abandoned: SQLite's progress handler interrupts it, and on PostgreSQL it
+runs under a ``statement_timeout`` of the time left. (Without a thread
+pool, as under the test runner's in-memory SQLite, the sections run one
+after another within the same overall deadline.)
+
+Results are cached per normalized query. Any Job, Company or Applicant
+change bumps a version number that is part of every cache key, which
+invalidates all cached searches at once.
+"""
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections
+
+from .fuzzy import fuzzy_job_ids
+from .models import Applicant, Company, Job
+from .search import in_rank_order, search_jobs
+
+SECTION_LIMIT = 5
+CACHE_TIMEOUT = 30
+VERSION_KEY = 'unified_search:version'
+# SQLite VM instructions between deadline checks
+PROGRESS_STEPS = 1000
+
+_executor = None
+
+
+def normalize_query(query):
+    return ' '.join((query or '').lower().split())
+
+
+def job_results(query):
+    jobs = search_jobs(query, Job.objects.select_related('company'))
+    if not jobs.exists():
+        # Nothing matched exactly; try typo-tolerant matching ("pyhton")
+        jobs = in_rank_order(Job.objects.select_related('company'), fuzzy_job_ids(query))
+    return jobs
+
+
+def company_results(query):
+    return Company.objects.filter(company_name__icontains=query).order_by('company_name', 'id')
+
+
+def candidate_results(query):
+    return Applicant.objects.select_related('user').filter(user__username__icontains=query).order_by('id')
+
+
+SECTIONS = {
+    'jobs': job_results,
+    'companies': company_results,
+    'candidates': candidate_results,
+}
+
+
+def _timed_out():
+    return {'results': [], 'has_more': True, 'timed_out': True}
+
+
+@contextmanager
+def query_deadline(deadline):
+    """Abort this thread's queries that are still running at ``deadline`` (a ``time.monotonic()``)."""
+    connection.ensure_connection()
+    if connection.vendor == 'sqlite':
+        connection.connection.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+        try:
+            yield
+        finally:
+            connection.connection.set_progress_handler(None, PROGRESS_STEPS)
+    elif connection.vendor == 'postgresql':
+        # Per statement, so each one gets at most the time left now
+        milliseconds = max(int((deadline - time.monotonic()) * 1000), 1)
+        with connection.cursor() as cursor:
+            cursor.execute('SET statement_timeout = %s', [milliseconds])
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('RESET statement_timeout')
+    else:
+        yield
+
+
+def _top(section, query, limit, deadline):
+    try:
+        with query_deadline(deadline):
+            rows = list(SECTIONS[section](query)[:limit + 1])
+    except OperationalError:
+        if time.monotonic() < deadline:
+            raise
+        return _timed_out()
+    return {'results': rows[:limit], 'has_more': len(rows) > limit, 'timed_out': False}
+
+
+def _top_in_worker(section, query, limit, deadline):
+    try:
+        return _top(section, query, limit, deadline)
+    finally:
+        # Worker threads open their own connections; don't leak them
+        connections.close_all()
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.UNIFIED_SEARCH_WORKERS * 2,
+            thread_name_prefix='unified-search',
+        )
+    return _executor
+
+
+def _parallel():
+    # An in-memory SQLite database (the test runner's) can't be shared
+    # across threads mid-transaction, so search it inline.
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        return False
+    return settings.UNIFIED_SEARCH_WORKERS > 1
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Only a miss writes; add() is a write on the shared tier
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidate():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+def _cache_key(query, limit):
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return f'unified_search:{_version()}:{limit}:{digest}'
+
+
+def unified_search(query, limit=SECTION_LIMIT):
+    """``{section: {'results', 'has_more', 'timed_out'}}`` for a search query."""
+    query = normalize_query(query)
+    key = _cache_key(query, limit)
+    results = cache.get(key)
+    if results is not None:
+        return results
+
+    deadline = time.monotonic() + settings.UNIFIED_SEARCH_TIMEOUT
+    if _parallel():
+        futures = {section: _pool().submit(_top_in_worker, section, query, limit, deadline) for section in SECTIONS}
+        wait(futures.values(), timeout=settings.UNIFIED_SEARCH_TIMEOUT)
+        results = {}
+        for section, future in futures.items():
+            if future.done():
+                results[section] = future.result()
+            else:
+                # Still queued; a running query is interrupted at the deadline
+                future.cancel()
+                results[section] = _timed_out()
+    else:
+        results = {section: _top(section, query, limit, deadline) for section in SECTIONS}
+
+    # Don't cache partial pages
+    if not any(section['timed_out'] for section in results.values()):
+        cache.set(key, results, CACHE_TIMEOUT)
+    return results
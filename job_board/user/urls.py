@@ -30,6 +30,7 @@ urlpatterns = [
     path('register_candidates/', views.register_candidates, name= 'register_candidates'),  
     path('user_profile/', views.user_profile, name= 'user_profile'),
     path('job_apply/<int:myid>/', views.job_apply, name= 'job_apply'),
+    path('job_apply/<int:myid>/quick/', views.quick_apply, name='quick_apply'),
     path("applied_jobs/", views.applied_jobs, name="applied_jobs"),
     path('delete_applied_job/<int:application_id>/', views.delete_applied_job, name='delete_applied_job'),
     
@@ -53,11 +54,19 @@ urlpatterns = [
 
     path('all_applicants/', views.all_applicants, name= 'all_applicants'),  
     path('delete-applicant/<int:id>/', views.delete_applicant, name='delete_applicant'),
+    path('applications/status/', views.update_application_statuses, name='update_application_statuses'),
+    path('exports/', views.export_applications, name='export_applications'),
+    path('exports/<int:export_id>/', views.export_status, name='export_status'),
+    path('exports/<int:export_id>/download/', views.export_download, name='export_download'),
+    path('applications/changes/', views.application_changes, name='application_changes'),
 
 
     path('company/<int:company_id>/vacancies/', views.company_vacancies, name='company_vacancies'),
    
-    path('download',views.all_download,name='download')
+    path('download',views.all_download,name='download'),
+
+    # MEDIA_URL
+    path('media/<path:path>', views.media_file, name='media_file'),
     
  ]
 
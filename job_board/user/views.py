@@ -1,24 +1,45 @@
 from datetime import date
-import csv
-from django.http import HttpResponse
+import math
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 import logging
 from django.core.mail import send_mail
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, render, redirect
+from django.db import transaction
+from django.urls import reverse
+from django.utils.dateparse import parse_date
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.models import User
-from .models import Applicant, Application, Company, Job, Notification
+from .models import Applicant, Application, Company, ExportJob, Job, Notification
 from django.core.paginator import Paginator
 from datetime import timedelta
 from django.utils.timezone import now
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
-from .tasks import send_contact_email_task 
+from .tasks import export_applications_task, send_contact_email_task 
+from .search import in_rank_order, search_jobs
+from .unified_search import SECTIONS, normalize_query, unified_search
+from .pagination import KeysetPaginator
+from .facets import job_facets, normalize_filters
+from .skills import jobs_with_skills
+from .matching import recommend_jobs, top_candidates
+from . import geo
+from .roles import lookup_role, remember_role
+from .feed import latest_jobs
+from .query_budget import query_budget
+from .exports import FORMATS, application_rows, available_formats, company_applications, csv_lines
+from .resumes import add_version as add_resume_version, latest as latest_resume, limit_resume_uploads, rejected_uploads, validate_resume
+from .resume_text import matching_files as matching_cv_files
+from .media_serving import serve as serve_media
+from .statuses import MAX_SELECTED, STATUSES, TooManySelected, change_statuses, selected_ids
+from .delta import DEFAULT_LIMIT, MAX_LIMIT, InvalidWatermark, changes_since
+from .conditional import candidate_state, company_jobs_state, conditional_page, job_candidates_state, job_state
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 from django.http import HttpResponse
 from django.conf import settings
  
+@query_budget(10)
 def login_user(request): 
     if request.user.is_authenticated:
         return redirect("/")
@@ -34,22 +55,11 @@ def login_user(request):
         user = authenticate(username=username, password=password)
 
         if user is not None: 
-            try:
-                applicant = Applicant.objects.get(user=user)
-                if applicant.type == "applicant":
-                    login(request, user)
-                    return redirect("user_homepage")
-            except Applicant.DoesNotExist:
-                pass   
-
-     
-            try:
-                company = Company.objects.get(user=user)
-                if company.type == "company":
-                    login(request, user)
-                    return redirect("company_homepage")
-            except Company.DoesNotExist:
-                pass
+            role = lookup_role(user)
+            if role.profile is not None and role.profile.type == role.name:
+                login(request, user)
+                remember_role(request, role)
+                return redirect("user_homepage" if role.is_applicant else "company_homepage")
  
             messages.error(request, "User type not recognized or invalid account.")
         else: 
@@ -61,12 +71,14 @@ def login_user(request):
 
 
 
+@query_budget(4)
 def logout_user(request):
     logout(request)
     return redirect('login')
 
 
 
+@query_budget(6)
 def register_candidates(request):
     if request.method == "POST":   
         username = request.POST.get('username')
@@ -108,6 +120,7 @@ def register_candidates(request):
 
     return render(request, "accounts/register_candidates.html")
 
+@query_budget(7)
 def register_company(request): 
     if request.method == "POST":   
         username = request.POST.get('username')
@@ -157,53 +170,33 @@ def register_company(request):
 
 
   
+@query_budget(4)
 def home(request): 
-    if request.user.is_authenticated:
-        # Applicant
-        try:
-            applicant = Applicant.objects.get(user=request.user)
-            if applicant: 
-                query = request.GET.get('q')
-                if query:
-                    jobs = Job.objects.filter(title__icontains=query).order_by('-creation_date')  # Job search for candidates
-                else:
-                    jobs = Job.objects.all().order_by('-creation_date')[:5]  # Show all available jobs (limit to 5)
-                return render(request, 'home.html', {'jobs': jobs, 'username': request.user.username, 'query': query})
-        except Applicant.DoesNotExist:
-            pass
+    # Applicants, companies and visitors all see the same feed
+    if request.user.is_authenticated and not request.user_role.name:
+        return redirect("login")
 
-        #   Company
-        try:
-            company = Company.objects.get(user=request.user)
-            if company:
-                query = request.GET.get('q')
-                if query:
-                    jobs = Job.objects.filter(title__icontains=query).order_by('-creation_date')  
-                else:
-                    jobs = Job.objects.all().order_by('-creation_date')[:5]  
-                return render(request, 'home.html', {'jobs': jobs, 'username': request.user.username, 'query': query})
-        except Company.DoesNotExist:
-            pass
-         
-        return redirect("login") 
-    else: 
-        query = request.GET.get('q')
-        if query:
-            jobs = Job.objects.filter( 
-                     title__icontains=query ,location__icontains=query).order_by('-creation_date')   
-        else:
-            jobs = Job.objects.all().order_by('-creation_date')[:5]   
-            # featured_jobs = Job.objects.filter(featured=True)[:5]  
-        return render(request, 'home.html', {'jobs': jobs, 'query': query})
+    query = request.GET.get('q')
+    context = {'query': query}
+    if query:
+        context['jobs'] = search_jobs(query).select_related('company')  # Job search for candidates
+    else:
+        latest = latest_jobs()
+        context.update(jobs=latest['jobs'], feed_version=latest['version'])
+    if request.user.is_authenticated:
+        context['username'] = request.user.username
+    return render(request, 'home.html', context)
 
 
  
+@query_budget(2)
 def about(request):
     return render(request,"about.html")
 
 
 
 
+@query_budget(2)
 def contact(request):
     user_email = None
     if request.user.is_authenticated:
@@ -291,15 +284,19 @@ def contact(request):
 
 
 
+@query_budget(3)
 def candidates(request):
-    candidates = Applicant.objects.all()
+    candidates = Applicant.objects.select_related('user')
     return render(request,"candidates.html", {'candidates': candidates})
 
+@query_budget(4)
+@conditional_page(candidate_state)
 def candidate_details(request, myid):
-    candidate = Applicant.objects.get(id=myid)
+    candidate = get_object_or_404(Applicant.objects.select_related('user'), id=myid)
     return render(request,"candidate_details.html", {'candidate': candidate})
  
 
+@query_budget(3)
 def employers(request):
     companies = Company.objects.all() 
     context = {
@@ -308,11 +305,13 @@ def employers(request):
     return render(request,"employers.html", {'companies': companies})
 
 
+@query_budget(5)
+@conditional_page(company_jobs_state)
 def company_vacancies(request, company_id):
  
     company = get_object_or_404(Company, id=company_id)
      
-    jobs = Job.objects.filter(company=company)
+    jobs = Job.objects.filter(company=company).select_related('company')
      
     context = {
         'company': company,
@@ -321,38 +320,77 @@ def company_vacancies(request, company_id):
     
     return render(request, 'company_vacancies.html', context)
 
+@query_budget(7)
 def search_results(request):
     query = request.GET.get('q')
-    jobs = Job.objects.all()
-    companies = Company.objects.all()
-    candidates = Applicant.objects.all()
-
-    if query:
-        jobs = jobs.filter(title__icontains=query)
-        companies = companies.filter(company_name__icontains=query)
-        candidates = candidates.filter(user__username__icontains=query)
-
+    section = request.GET.get('section')
+
+    # "See more" for one section: plain numbered pages of that section only
+    if section in SECTIONS:
+        paginator = Paginator(SECTIONS[section](normalize_query(query)), 20)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        return render(request, 'search.html', {
+            section: page_obj,
+            'page_obj': page_obj,
+            'section': section,
+            'query': query,
+        })
+
+    results = unified_search(query)
     return render(request, 'search.html', {
-        'jobs': jobs,
-        'companies': companies,
-        'candidates': candidates,
+        'jobs': results['jobs']['results'],
+        'companies': results['companies']['results'],
+        'candidates': results['candidates']['results'],
+        'results': results,
         'query': query
     })
 
 
+DEFAULT_RADIUS = 25
+
+
+@query_budget(7)
 def job_listing(request):
     query = request.GET.get('q')
-    sort_option = request.GET.get('sort', 'creation_date_desc')
+    # Searches default to relevance order, "near" searches to nearest first
+    # and plain listings to newest first
+    default_sort = 'relevance' if query else 'distance' if request.GET.get('near') else 'creation_date_desc'
+    sort_option = request.GET.get('sort', default_sort)
     job_types = request.GET.getlist('job_type')
     experiences = request.GET.getlist('experience')
     posted_within = request.GET.getlist('posted_within')
+    skills = request.GET.get('skills', '')
+    skill_match = request.GET.get('skill_match', 'any')
+    near = request.GET.get('near', '').strip()
+    try:
+        radius = float(request.GET.get('radius', DEFAULT_RADIUS))
+    except ValueError:
+        radius = DEFAULT_RADIUS
+    # float() takes "nan" and "inf", which min()/max() let through
+    radius = min(max(radius, 1), 500) if math.isfinite(radius) else DEFAULT_RADIUS
 
     # Start with all jobs
-    jobs = Job.objects.all()
+    jobs = Job.objects.select_related('company')
+
+    # Filter by distance from a pincode or place
+    origin = geo.lookup(near, near) if near else None
+    if origin:
+        jobs = geo.within_radius(jobs, origin[0], origin[1], radius)
+    elif near:
+        messages.warning(request, f"Could not find a location for \"{near}\".")
 
-    # Filter by job title (search query)
+    # Full-text search (title, description, skills, location, company)
     if query:
-        jobs = jobs.filter(title__icontains=query)
+        jobs = search_jobs(query, jobs)
+
+    # Filter by required skills (any-of / all-of)
+    if skills:
+        jobs = jobs_with_skills(skills, skill_match, jobs)
+
+    # Sidebar counts, computed before the facet filters narrow the queryset
+    facets = job_facets(jobs, normalize_filters(
+        query, job_types, experiences, posted_within, skills, skill_match, origin=origin, radius=radius,
+    ))
 
     # Filter by job type
     if job_types:
@@ -381,28 +419,64 @@ def job_listing(request):
         'title_desc': '-title',
     }
 
-    # Determine the sort field, default is creation_date_desc
+    # Determine the sort field, default is creation_date_desc.
+    # search_jobs() has already ordered the results by relevance.
     sort_field = sort_dict.get(sort_option, '-creation_date')
-    jobs = jobs.order_by(sort_field)
-
-    # Paginator
-    paginator = Paginator(jobs, 7)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    ranked = (query and sort_option == 'relevance') or (origin and sort_option == 'distance')
+    if origin and sort_option == 'distance':
+        jobs = jobs.order_by('distance', 'id')
+    elif not ranked:
+        jobs = jobs.order_by(sort_field)
+
+    # Filters to carry over into pagination links
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
+
+    # Keyset pagination by default; numbered pages are kept for old ?page=
+    # links and for relevance/distance order, which have no stored seek key.
+    cursor_mode = not ranked and 'page' not in request.GET
+    if cursor_mode:
+        paginator = KeysetPaginator(jobs, sort_field, 7)
+        page_obj = paginator.get_page(
+            request.GET.get('cursor'),
+            with_count=request.GET.get('count') == 'exact',
+        )
+        jobs_count = page_obj.count
+    else:
+        paginator = Paginator(jobs, 7)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+        jobs_count = paginator.count
 
     return render(request, 'job_listing.html', {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'jobs_count': jobs_count,
+        'querystring': params.urlencode(),
         'query': query,
         'sort_option': sort_option,
         'job_types': job_types,
+        'experiences': experiences,
+        'posted_within': posted_within,
+        'skills': skills,
+        'skill_match': skill_match,
+        'near': near,
+        'radius': int(radius),
+        'origin': origin,
+        'facets': facets,
     })
 
 
+@query_budget(10)
+@limit_resume_uploads
 def job_apply(request, myid): 
     if not request.user.is_authenticated:
         return redirect("login")
     
-    applicant = Applicant.objects.get(user=request.user)
+    applicant = request.user_role.applicant
+    if applicant is None:
+        return redirect("login")
     job = get_object_or_404(Job, id=myid)
     date1 = date.today()
 
@@ -420,22 +494,36 @@ def job_apply(request, myid):
         messages.error(request, "You have already applied for this job.")
         return render(request, "job_apply.html", {'job': job})
 
+    # The candidate's CV library, newest first
+    resumes = list(applicant.resumes.order_by('-uploaded_at', '-id'))
+    context = {'job': job, 'resumes': resumes}
+
     # Handle POST request for job application
     if request.method == "POST": 
-        # Check if resume is provided in the request
-        if 'resume' not in request.FILES:
+        # A new upload, checked before anything is stored
+        upload = request.FILES.get('resume')
+        error = rejected_uploads(request).get('resume')
+        if upload is not None and error is None:
+            error = validate_resume(upload)
+        if error:
+            messages.error(request, error)
+            return render(request, "job_apply.html", context)
+
+        # Otherwise one of the CVs already in the library
+        if upload is not None:
+            resume = add_resume_version(applicant, upload)
+        else:
+            resume = next((r for r in resumes if str(r.pk) == request.POST.get('resume_id')), None)
+        if resume is None:
             messages.error(request, "All fields are required. Please upload your resume.")
-            return render(request, "job_apply.html", {'job': job})
-
-        # Get the resume from the uploaded files
-        resume = request.FILES['resume']
+            return render(request, "job_apply.html", context)
 
-        # Create a new application
+        # The application shares the stored file instead of copying it
         Application.objects.create(
             job=job,
             company=job.company,
             applicant=applicant,
-            resume=resume,
+            resume=resume.file.name,
             apply_date=date.today()
         )
 
@@ -443,15 +531,44 @@ def job_apply(request, myid):
         messages.success(request, "You have successfully applied for the job!")
         return render(request, "job_apply.html", {'alert': True, 'job': job})
 
-    return render(request, "job_apply.html", {'job': job})
+    return render(request, "job_apply.html", context)
+
+
+@query_budget(9)
+def quick_apply(request, myid):
+    """Apply with the newest CV in the candidate's library, without uploading anything."""
+    if request.method != 'POST':
+        return redirect('job_apply', myid=myid)
+    applicant = request.user_role.applicant
+    if applicant is None:
+        return redirect('login')
+    job = get_object_or_404(Job, id=myid)
+
+    today = date.today()
+    if not job.start_date <= today <= job.end_date:
+        messages.error(request, "This job is not accepting applications.")
+        return redirect('job_details', myid=job.id)
+    if Application.objects.filter(job=job, applicant=applicant).exists():
+        messages.error(request, "You have already applied for this job.")
+        return redirect('applied_jobs')
+    resume = latest_resume(applicant)
+    if resume is None:
+        messages.error(request, "Please upload your resume to apply.")
+        return redirect('job_apply', myid=job.id)
+
+    Application.objects.create(
+        job=job, company=job.company, applicant=applicant, resume=resume.file.name, apply_date=today,
+    )
+    messages.success(request, f"You have successfully applied for {job.title} with {resume.name}.")
+    return redirect('applied_jobs')
 
 
+@query_budget(5)
 def applied_jobs(request):
     if request.user.is_authenticated:
-        try: 
-            applicant = Applicant.objects.get(user=request.user)
-             
-            applied_jobs = Application.objects.filter(applicant=applicant).select_related('job').order_by('-apply_date')
+        applicant = request.user_role.applicant
+        if applicant is not None:
+            applied_jobs = Application.objects.filter(applicant=applicant).select_related('job__company').order_by('-apply_date')
            
             applied_jobs_count = applied_jobs.count()
              
@@ -463,16 +580,18 @@ def applied_jobs(request):
                            
                            })
         
-        except Applicant.DoesNotExist:
-            return redirect('login')
+        return redirect('login')
     else:
         return redirect('login')
 
 
+@query_budget(8)
 def delete_applied_job(request, application_id):
     if request.user.is_authenticated:
-        applicant = get_object_or_404(Applicant, user=request.user)        
-        application = get_object_or_404(Application, id=application_id, applicant=applicant)   
+        applicant = request.user_role.applicant
+        if applicant is None:
+            return redirect('login')
+        application = get_object_or_404(Application.objects.select_related('job'), id=application_id, applicant=applicant)   
         application.delete()     
         messages.success(request, "Application deleted successfully.")   
         return redirect('applied_jobs')
@@ -483,48 +602,178 @@ def delete_applied_job(request, application_id):
 #     application = Application.objects.filter(company=company)
 #     return render(request, "admin/employers/all_applicants.html", {'application':application})    
 
+def _report_status_change(request, status, changed):
+    if not changed:
+        return
+    text = f"{len(changed)} application{'s' if len(changed) != 1 else ''} {STATUSES[status].lower()}."
+    if status == 'rejected':
+        messages.warning(request, text)
+    else:
+        messages.success(request, text)
+
+
+@query_budget(12)
 def all_applicants(request):
-    company = Company.objects.get(user=request.user)
+    company = request.user_role.company
+    if company is None:
+        return redirect('login')
 
     if request.method == 'POST':
-        application_id = request.POST.get('application_id')
         new_status = request.POST.get('status')
-        application = get_object_or_404(Application, id=application_id, company=company)
-
-        # Check if the application status has already been set
-        # if application.status:
-        #     messages.error(request, "The status for this application has already been updated and cannot be changed again.")
-        #     return redirect('all_applicants')  # Redirect without making changes
- 
-        application.status = new_status
-        application.save()
-
-        # Send notification to the applicant
-        applicant_user = application.applicant.user  
-        if new_status == 'accepted':
-            notification_message = f"Your application for   {application.job}  has been accepted."
-            messages.success(request, notification_message)
-        elif new_status == 'rejected':
-            notification_message = f"Your application for   {application.job}  has been rejected."
-            messages.warning(request, notification_message)
- 
-        Notification.objects.create(
-            user=applicant_user,
-            message=notification_message
-        )
-
+        if new_status not in STATUSES:
+            return redirect('all_applicants')
+        changed, unchanged = change_statuses(company, selected_ids([request.POST.get('application_id')]), new_status)
+        if not changed and not unchanged:
+            raise Http404
+        _report_status_change(request, new_status, changed)
         return redirect('all_applicants')
  
-    application_list = Application.objects.filter(company=company)
+    application_list = Application.objects.filter(job__company=company).select_related('job', 'applicant__user')
+    cv_query = request.GET.get('cv', '').strip()
+    if cv_query:
+        application_list = application_list.filter(resume__in=matching_cv_files(cv_query))
 
     return render(request, "admin/employers/all_applicants.html", {
         'application': application_list,
+        'cv_query': cv_query,
+        'jobs': Job.objects.filter(company=company).values_list('id', 'title'),
+        'statuses': Application._meta.get_field('status').choices,
+        'formats': available_formats(),
+        'exports': ExportJob.objects.filter(company=company).order_by('-created_at')[:10],
+    })
+
+
+@query_budget(10)
+def update_application_statuses(request):
+    """
+    Accept or reject the ticked applications at once (user.statuses).
+    The applicant list's script asks for JSON and redraws only those rows;
+    a plain form post is redirected back to the list.
+    """
+    company = request.user_role.company
+    if company is None:
+        return redirect('login')
+    if request.method != 'POST':
+        return redirect('all_applicants')
+
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    status = request.POST.get('status')
+    try:
+        ids = selected_ids(request.POST.getlist('application_ids'))
+    except TooManySelected:
+        ids, error = None, f"Select at most {MAX_SELECTED} applications at a time."
+    else:
+        error = "Select some applications and a status."
+    if status not in STATUSES or not ids:
+        if wants_json:
+            return JsonResponse({'error': error}, status=400)
+        messages.error(request, error)
+        return redirect('all_applicants')
+
+    changed, unchanged = change_statuses(company, ids, status)
+    if wants_json:
+        return JsonResponse({
+            'status': status,
+            'status_display': STATUSES[status],
+            'changed': changed,
+            'unchanged': unchanged,
+        })
+    _report_status_change(request, status, changed)
+    return redirect('all_applicants')
+
+
+@query_budget(6)
+def export_applications(request):
+    company = request.user_role.company
+    if company is None:
+        return redirect('login')
+    if request.method != 'POST':
+        return redirect('all_applicants')
+
+    export_format = request.POST.get('format')
+    if export_format not in dict(available_formats()):
+        messages.error(request, "That export format isn't available.")
+        return redirect('all_applicants')
+
+    filters = {}
+    job_id = request.POST.get('job')
+    if job_id and job_id.isdigit() and Job.objects.filter(id=job_id, company=company).exists():
+        filters['job'] = int(job_id)
+    status = request.POST.get('status')
+    if status in dict(Application._meta.get_field('status').choices):
+        filters['status'] = status
+    for field in ('date_from', 'date_to'):
+        try:
+            value = parse_date(request.POST.get(field) or '')
+        except ValueError:
+            # Well formed but not a real date, e.g. 2024-02-30
+            value = None
+        if value:
+            filters[field] = value.isoformat()
+
+    export = ExportJob.objects.create(company=company, format=export_format, filters=filters)
+    transaction.on_commit(lambda: export_applications_task.delay(export.pk))
+    messages.success(request, "Your export has started. It will appear below when it's ready.")
+    return redirect('all_applicants')
+
+
+def _company_export(request, export_id):
+    company = request.user_role.company
+    if company is None:
+        raise Http404
+    return get_object_or_404(ExportJob, id=export_id, company=company)
+
+
+@query_budget(4)
+def export_status(request, export_id):
+    export = _company_export(request, export_id)
+    return JsonResponse({
+        'status': export.status,
+        'status_display': export.get_status_display(),
+        'processed_rows': export.processed_rows,
+        'total_rows': export.total_rows,
+        'percent': export.percent,
+        'error': export.error,
+        'download_url': reverse('export_download', args=[export.id]) if export.status == ExportJob.DONE else None,
     })
 
 
+@query_budget(4)
+def export_download(request, export_id):
+    export = _company_export(request, export_id)
+    if export.status != ExportJob.DONE or not export.file:
+        raise Http404
+    extension, content_type, _ = FORMATS[export.format]
+    return FileResponse(
+        export.file.open('rb'), as_attachment=True,
+        filename=f'applications.{extension}', content_type=content_type,
+    )
+
+
+@query_budget(5)
+def application_changes(request):
+    """Applications changed or deleted since ``?watermark=`` (omit it for a full first sync)."""
+    if not request.user.is_authenticated:
+        return redirect('login')
+    company = request.user_role.company
+    if company is None:
+        return redirect('login')
+
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    try:
+        changes = changes_since(company, request.GET.get('watermark'), limit)
+    except InvalidWatermark:
+        return JsonResponse({'error': 'Invalid watermark.'}, status=400)
+    return JsonResponse(changes)
+
+
 
+@query_budget(4)
 def delete_applicant(request, id):
-    application = get_object_or_404(Application, id=id)
+    application = get_object_or_404(Application.objects.select_related('job'), id=id)
     
     if request.method == 'POST':
         application.delete()
@@ -535,6 +784,7 @@ def delete_applicant(request, id):
 
  
 
+@query_budget(4)
 def delete_account(request):
     if request.method == 'POST':
         # Check if the user is authenticated
@@ -548,11 +798,14 @@ def delete_account(request):
 
  #company 
 
+@query_budget(3)
 def company_homepage(request):
        # Assuming each user has one company, get the company related to the logged-in user
     if request.user.is_authenticated:
         # Get the company for the authenticated user
-        company = Company.objects.get(user=request.user)
+        company = request.user_role.company
+        if company is None:
+            return redirect('login')
         
         context = {
             'company': company,  # Pass the company to the template
@@ -562,10 +815,13 @@ def company_homepage(request):
         return redirect('login')  # Redirect to login if not authenticated
 
 
+@query_budget(8)
 def company_profile(request):
     if not request.user.is_authenticated:
         return redirect("login")
-    company = Company.objects.get(user=request.user)
+    company = request.user_role.company
+    if company is None:
+        return redirect("login")
     if request.method=="POST":   
         company_name = request.POST['company_name']
         first_name=request.POST['first_name']
@@ -598,6 +854,7 @@ def company_profile(request):
 
 
 
+@query_budget(17)
 def add_job(request):
     if not request.user.is_authenticated:
         return redirect("login")       
@@ -615,8 +872,9 @@ def add_job(request):
         job_type = request.POST['job-Type']  
         work_location = request.POST['Work-location']   
 
-        user = request.user
-        company = Company.objects.get(user=user)
+        company = request.user_role.company
+        if company is None:
+            return redirect("login")
         job = Job.objects.create(company=company, title=title,start_date=start_date, end_date=end_date, salary=salary, 
                                  image=image, experience=experience, location=location, skills=skills, description=description,job_type=job_type,
                                  work_location=work_location, creation_date=date.today())
@@ -630,6 +888,7 @@ def add_job(request):
 
 
 
+@query_budget(12)
 def edit_job(request, myid):
     if not request.user.is_authenticated:
         return redirect("/company_login")
@@ -657,24 +916,19 @@ def edit_job(request, myid):
         job.description = description
         job.job_type = job_type
         job.work_location = work_location
-        job.save()
-        messages.success(request, 'Job edited successfully!') 
 
         if start_date:
             job.start_date = start_date
-            job.save()
 
         if end_date:
             job.end_date = end_date
-            job.save()
 
-       
-        try:
-            image = request.FILES['image']
-            job.image = image
-            job.save()
-        except KeyError:
-            pass
+        if 'image' in request.FILES:
+            job.image = request.FILES['image']
+
+        # One save, so the search/skills/vector signals run once per edit
+        job.save()
+        messages.success(request, 'Job edited successfully!') 
 
         return redirect('edit_job', myid=myid)   
 
@@ -682,22 +936,31 @@ def edit_job(request, myid):
 
 
 
+@query_budget(4)
+@conditional_page(job_state)
 def job_details(request, myid):
-    job = Job.objects.get(id=myid)
+    job = get_object_or_404(Job.objects.select_related('company__user'), id=myid)
     return render(request,"job_details.html", {'job':job})
 
   
+@query_budget(4)
 def job_list(request):
     if not request.user.is_authenticated:
         return redirect("login")
-    companies = Company.objects.get(user=request.user)
+    companies = request.user_role.company
+    if companies is None:
+        return redirect("login")
     jobs = Job.objects.filter(company=companies)
     return render(request, "admin/employers/job_list.html", {'jobs':jobs})
 
+@query_budget(5)
+@conditional_page(job_candidates_state)
 def job_detail(request, myid):
-    job = Job.objects.get(id=myid)
-    return render(request, "admin/employers/job_detail.html", {'job':job})
+    job = get_object_or_404(Job.objects.select_related('company__user'), id=myid)
+    candidates = in_rank_order(Applicant.objects.select_related('user'), top_candidates(job, k=5))
+    return render(request, "admin/employers/job_detail.html", {'job':job, 'top_candidates': candidates})
 
+@query_budget(9)
 def delete_job(request, job_id):
     job = get_object_or_404(Job, id=job_id)
 
@@ -708,6 +971,7 @@ def delete_job(request, job_id):
 
     return redirect('job_list')
 
+@query_budget(12)
 def settings(request):
     if not request.user.is_authenticated:
         return redirect('/login/') 
@@ -733,6 +997,7 @@ def settings(request):
 
 #  User Candidate
 
+@query_budget(5)
 def user_homepage(request):
     if not request.user.is_authenticated:
         return redirect('login/')
@@ -740,11 +1005,21 @@ def user_homepage(request):
     # Fetch unread notifications for the logged-in user
     notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')
 
+    # "Jobs for you", leaving out jobs the candidate already applied to
+    recommended_jobs = Job.objects.none()
+    applicant = request.user_role.applicant
+    if applicant:
+        applied = Application.objects.filter(applicant=applicant).values_list('job_id', flat=True)
+        ids = recommend_jobs(applicant, k=5, exclude=list(applied))
+        recommended_jobs = in_rank_order(Job.objects.select_related('company'), ids)
+
     return render(request, "admin/candidates/user_homepage.html", {
         'notifications': notifications,
+        'recommended_jobs': recommended_jobs,
     })
 
 
+@query_budget(3)
 def notification(request):
     if not request.user.is_authenticated:
         return redirect('login/')
@@ -756,11 +1031,15 @@ def notification(request):
     })
 
  
+@query_budget(8)
+@limit_resume_uploads
 def user_profile(request):
     if not request.user.is_authenticated:
         return redirect('/login/') 
     
-    applicant = Applicant.objects.get(user=request.user)
+    applicant = request.user_role.applicant
+    if applicant is None:
+        return redirect('/login/')
 
     if request.method=="POST":   
         email = request.POST['email']
@@ -801,7 +1080,14 @@ def user_profile(request):
             applicant.image = request.FILES['image']
         
         if 'cv' in request.FILES:  # Check if 'cv' is in request.FILES before accessing it
-            applicant.cv = request.FILES['cv']
+            error = validate_resume(request.FILES['cv'])
+            if error:
+                messages.error(request, error)
+            else:
+                # The new CV becomes the latest version in the library too
+                applicant.cv = add_resume_version(applicant, request.FILES['cv']).file.name
+        elif 'cv' in rejected_uploads(request):
+            messages.error(request, rejected_uploads(request)['cv'])
         
         applicant.save()
 
@@ -813,50 +1099,21 @@ def user_profile(request):
     return render(request, "admin/candidates/user_profile.html", {'applicant':applicant})
 
 
+@query_budget(4)
 def all_download(request):
-    application_list = Application.objects.all()
+    if not request.user.is_authenticated:
+        return redirect('login')
+    company = request.user_role.company
+    if company is None:
+        return redirect('login')
 
-    response = HttpResponse(content_type='text/csv')
+    rows = application_rows(company_applications(company))
+    response = StreamingHttpResponse(csv_lines(rows), content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="applications.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow([
-        'Company', 'Job','Start Date','Deadline','Required Skills','Required Experience', 'Job Type','Work Mode',
-        'Applicant','Email', 'PassedOut Year', 'Gender', 'Phone','Education', 'Resume', 'Experience', 
-        'Candidate Place','Candidate District','Candidate State','Candidate Country','Candidate Pincode',
-        'Type','Applied On', 'Status'
-    ])
-
-    for app in application_list:
-        applicant = app.applicant
-        job=app.job
-        company=app.company
-        writer.writerow([
-            str(app.company),  # FK
-            str(app.job),     # FK
-            job.start_date,
-            job.end_date,
-            job.skills,
-            job.experience,
-            job.job_type,
-            job.work_location,
-            applicant.user.get_full_name(),  # Applicant full name from User model
-            app.applicant.user.email,   # ✅ From Applicant model
-            applicant.year,
-            applicant.gender,
-            applicant.phone,
-            applicant.education_level,
-            str(app.resume),  # File URL if resume exists
-            applicant.work,
-            applicant.location,
-            applicant.district,
-            applicant.state,
-            applicant.country,
-            applicant.pincode,
-            applicant.type,
-            app.apply_date.strftime('%Y-%m-%d') if app.apply_date else '',
-            app.status
-        ])
-
     return response
 
+
+@query_budget(4)
+def media_file(request, path):
+    """An uploaded file, for users allowed to see it (user.media_serving)."""
+    return serve_media(request, path)